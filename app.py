@@ -2,11 +2,11 @@
 Interactive Quiz System - Main Streamlit Application
 ClassPoint-like quiz system for presenters and participants.
 """
+import uuid
+
 import streamlit as st
 import database as db
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import live_session
 
 # Page configuration
 st.set_page_config(
@@ -28,6 +28,38 @@ if 'current_session_code' not in st.session_state:
     st.session_state.current_session_code = None
 
 
+@st.cache_data(show_spinner=False)
+def get_cached_question(question_id):
+    """Questions never change once added, so every participant shares one copy."""
+    return db.get_question_by_id(question_id)
+
+
+@st.cache_data(show_spinner=False)
+def get_cached_question_number(quiz_id, question_id):
+    """Position of a question within its quiz (cached, questions never move)."""
+    return db.get_question_number(quiz_id, question_id)
+
+
+@st.cache_data(show_spinner=False)
+def get_cached_next_question_id(quiz_id, question_id):
+    """ID of the question following question_id, cached for prefetching."""
+    return db.get_next_question_id(quiz_id, question_id)
+
+
+def get_device_token(role):
+    """Per-browser token kept in the URL, so logging in again reuses the same user.
+
+    Tokens are kept per role: a presenter sharing their app link with the class
+    only shares a presenter token, which participant logins never read.
+    """
+    key = f"{role}_device"
+    token = st.query_params.get(key)
+    if not token:
+        token = uuid.uuid4().hex
+        st.query_params[key] = token
+    return token
+
+
 def login_page():
     """Display login/registration page."""
     st.title("📝 Interactive Quiz System")
@@ -41,7 +73,7 @@ def login_page():
         presenter_name = st.text_input("Enter your name:", key="presenter_name")
         if st.button("Login as Presenter", use_container_width=True):
             if presenter_name.strip():
-                user = db.create_user(presenter_name.strip(), 'presenter')
+                user = db.resolve_user(presenter_name.strip(), 'presenter', get_device_token('presenter'))
                 st.session_state.user_id = user['id']
                 st.session_state.user_name = user['name']
                 st.session_state.user_role = user['role']
@@ -55,7 +87,7 @@ def login_page():
         participant_name = st.text_input("Enter your name:", key="participant_name")
         if st.button("Login as Participant", use_container_width=True):
             if participant_name.strip():
-                user = db.create_user(participant_name.strip(), 'participant')
+                user = db.resolve_user(participant_name.strip(), 'participant', get_device_token('participant'))
                 st.session_state.user_id = user['id']
                 st.session_state.user_name = user['name']
                 st.session_state.user_role = user['role']
@@ -223,6 +255,9 @@ def launch_session_page():
 
     quiz_options = {f"{q['title']} (ID: {q['id']})": q['id'] for q in quizzes}
     selected_quiz = st.selectbox("Select Quiz:", list(quiz_options.keys()))
+    paced = st.checkbox(
+        "Presenter-paced (participants see one question at a time, as you advance it)"
+    )
 
     if st.button("Launch Session", type="primary"):
         quiz_id = quiz_options[selected_quiz]
@@ -232,7 +267,7 @@ def launch_session_page():
             st.error("Cannot launch session: Quiz has no questions!")
             return
 
-        session = db.create_session(quiz_id)
+        session = db.create_session(quiz_id, paced=paced, user_id=st.session_state.user_id)
         st.success(f"✅ Session launched successfully!")
         st.info(f"**Session Code:** `{session['session_code']}`")
         st.markdown("Share this code with participants to join the session.")
@@ -250,7 +285,7 @@ def active_sessions_page():
     """Page to view active sessions."""
     st.header("Active Sessions")
 
-    sessions = db.get_active_sessions()
+    sessions = db.get_active_sessions(user_id=st.session_state.user_id)
 
     if not sessions:
         st.info("No active sessions. Launch a session to get started!")
@@ -262,25 +297,55 @@ def active_sessions_page():
             st.subheader(f"📍 {session['quiz_title']}")
             st.write(f"Session Code: **{session['session_code']}**")
             st.write(f"Started: {session['created_at'].strftime('%Y-%m-%d %H:%M')}")
+            if session['paced']:
+                question_controls(session)
         with col2:
             if st.button("View Results", key=f"view_{session['id']}"):
                 st.session_state.viewing_session_id = session['id']
                 st.rerun()
         with col3:
             if st.button("End Session", key=f"end_{session['id']}", type="primary"):
-                db.end_session(session['id'])
+                db.end_session(session['id'], user_id=st.session_state.user_id)
+                live_session.drop_live_session(session['id'])
                 st.success("Session ended")
                 st.rerun()
 
         st.divider()
 
 
+def question_controls(session):
+    """Controls for advancing the current question of a paced session."""
+    current_id = session['current_question_id']
+    if current_id:
+        number = get_cached_question_number(session['quiz_id'], current_id)
+        st.write(f"Current question: **{number}**")
+    else:
+        st.write("Current question: **not started**")
+
+    previous_id = db.get_previous_question_id(session['quiz_id'], current_id) if current_id else None
+    next_id = db.get_next_question_id(session['quiz_id'], current_id)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("⬅️ Previous", key=f"prev_{session['id']}", disabled=previous_id is None):
+            db.set_current_question(session['id'], previous_id, user_id=st.session_state.user_id)
+            st.rerun()
+    with col2:
+        label = "Next ➡️" if current_id else "Start ▶️"
+        if st.button(label, key=f"next_{session['id']}", disabled=next_id is None):
+            db.set_current_question(session['id'], next_id, user_id=st.session_state.user_id)
+            st.rerun()
+
+
 def view_results_page():
     """Page to view session results."""
     st.header("View Session Results")
 
-    sessions = db.get_active_sessions()
-    all_sessions = sessions  # Could extend to include ended sessions
+    status = st.radio("Sessions:", ["Active", "Ended"], horizontal=True)
+    if status == "Active":
+        all_sessions = db.get_active_sessions(user_id=st.session_state.user_id)
+    else:
+        all_sessions = db.get_ended_sessions(user_id=st.session_state.user_id)
 
     if not all_sessions:
         st.info("No sessions available")
@@ -294,20 +359,111 @@ def view_results_page():
     selected_session = st.selectbox("Select Session:", list(session_options.keys()))
     session_id = session_options[selected_session]
 
-    display_session_results(session_id)
+    if status == "Active":
+        display_session_results(session_id)
+    else:
+        display_session_summary([s for s in all_sessions if s['id'] == session_id][0])
+
+
+def display_session_summary(session):
+    """Display the stored results summary of an ended session."""
+    import plotly.graph_objects as go
+
+    summary = db.get_session_summary(session['id'])
+    if summary is None:
+        # Not summarised by session_worker.py yet; compute it once now
+        summary = db.materialize_session_summary(session['id'])
+    questions = db.get_questions_by_quiz(session['quiz_id'])
+
+    st.subheader(f"Results: {session['quiz_title']}")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Participants", summary['participant_count'])
+    col2.metric("Responses", summary['response_count'])
+    if session['ended_at']:
+        col3.metric("Ended", session['ended_at'].strftime('%Y-%m-%d %H:%M'))
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("### 🏆 Leaderboard")
+        if summary['leaderboard']:
+            for rank, entry in enumerate(summary['leaderboard'], 1):
+                st.markdown(f"{rank}. **{entry['name']}** - {entry['score']}/{len(questions)} correct")
+        else:
+            st.info("No participants answered in this session")
+    with col2:
+        st.markdown("### Score Distribution")
+        distribution = summary['score_distribution']
+        if distribution:
+            fig = go.Figure(data=[
+                go.Bar(
+                    x=[entry['score'] for entry in distribution],
+                    y=[entry['count'] for entry in distribution],
+                    marker_color='#3498db'
+                )
+            ])
+            fig.update_layout(xaxis_title="Correct Answers", yaxis_title="Participants", height=300)
+            st.plotly_chart(fig, use_container_width=True)
+
+    st.divider()
+
+    for i, question in enumerate(questions, 1):
+        st.markdown(f"### Question {i}: {question['text']}")
+        tallies = summary['question_tallies'].get(str(question['id']), {})
+        total_responses = sum(tallies.values())
+        if not total_responses:
+            st.info("No responses for this question")
+            st.divider()
+            continue
+
+        answers = ['A', 'B', 'C', 'D']
+        fig = go.Figure(data=[
+            go.Bar(
+                x=answers,
+                y=[tallies.get(answer, 0) for answer in answers],
+                text=[tallies.get(answer, 0) for answer in answers],
+                textposition='auto',
+                marker_color=['#2ecc71' if answer == question['correct_answer'] else '#3498db'
+                              for answer in answers]
+            )
+        ])
+        fig.update_layout(
+            title="Responses Distribution",
+            xaxis_title="Answer",
+            yaxis_title="Number of Responses",
+            height=300
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+        correct_responses = tallies.get(question['correct_answer'], 0)
+        accuracy = (correct_responses / total_responses) * 100
+        st.metric("Accuracy", f"{accuracy:.1f}%", f"{correct_responses}/{total_responses} correct")
+        st.divider()
 
 
 def display_session_results(session_id):
     """Display detailed results for a session."""
+    # The charting stack is only needed here; importing it lazily keeps it off
+    # the participant path and out of every fresh worker's start-up
+    import pandas as pd
+    import plotly.graph_objects as go
+
     session = db.get_session_by_code(
-        [s for s in db.get_active_sessions() if s['id'] == session_id][0]['session_code']
+        [s for s in db.get_active_sessions(user_id=st.session_state.user_id) if s['id'] == session_id][0]['session_code'],
+        user_id=st.session_state.user_id
     )
     quiz = db.get_quiz_by_id(session['quiz_id'])
     questions = db.get_questions_by_quiz(session['quiz_id'])
+    live = live_session.get_live_session(session_id)
 
     st.subheader(f"Results: {quiz['title']}")
 
-    for i, question in enumerate(questions, 1):
+    numbered = list(enumerate(questions, 1))
+    # Paced sessions focus on the question participants are answering right now
+    if session['paced'] and session['current_question_id']:
+        if not st.checkbox("Show all questions", key=f"all_results_{session_id}"):
+            numbered = [(i, q) for i, q in numbered if q['id'] == session['current_question_id']]
+
+    for i, question in numbered:
         st.markdown(f"### Question {i}: {question['text']}")
 
         # Display question options
@@ -326,10 +482,14 @@ def display_session_results(session_id):
 
         st.markdown("---")
 
-        # Get aggregated results for chart
-        results = db.get_question_results(question['id'], session_id)
-        # Get detailed responses with participant names
-        detailed_responses = db.get_question_responses_detailed(question['id'], session_id)
+        if live:
+            results = live.question_results(question['id'])
+            detailed_responses = live.question_responses(question['id'])
+        else:
+            # Get aggregated results for chart
+            results = db.get_question_results(question['id'], session_id)
+            # Get detailed responses with participant names
+            detailed_responses = db.get_question_responses_detailed(question['id'], session_id)
 
         if results:
             # Create two columns: chart and participant list
@@ -465,7 +625,6 @@ def take_quiz():
     """Display quiz questions for participants."""
     session = db.get_session_by_code(st.session_state.current_session_code)
     quiz = db.get_quiz_by_id(session['quiz_id'])
-    questions = db.get_questions_by_quiz(session['quiz_id'])
 
     st.header(f"📝 {quiz['title']}")
     st.info(f"Session Code: {st.session_state.current_session_code}")
@@ -477,72 +636,114 @@ def take_quiz():
 
     st.divider()
 
+    if session['paced']:
+        take_paced_question(session)
+        return
+
     # Display questions
+    questions = db.get_questions_by_quiz(session['quiz_id'])
     for i, question in enumerate(questions, 1):
-        st.subheader(f"Question {i}")
-        st.write(question['text'])
+        display_question(question, i)
+
+
+def take_paced_question(session):
+    """Display only the question the presenter has made current."""
+    if st.button("🔄 Refresh"):
+        st.rerun()
+
+    current_id = session['current_question_id']
+    if current_id is None:
+        st.info("⏳ Waiting for the presenter to start the quiz...")
+        return
 
-        # Check if already answered
+    display_question(
+        get_cached_question(current_id),
+        get_cached_question_number(session['quiz_id'], current_id)
+    )
+
+    # Prefetch the next question so everyone's rerun after the presenter advances is a cache hit
+    next_id = get_cached_next_question_id(session['quiz_id'], current_id)
+    if next_id:
+        get_cached_question(next_id)
+
+
+def display_question(question, number):
+    """Display a single question with its answer form or the submitted answer."""
+    st.subheader(f"Question {number}")
+    st.write(question['text'])
+
+    # Check if already answered (from the live session in memory while it is active)
+    live = live_session.get_live_session(st.session_state.current_session_id)
+    if live:
+        existing_response = live.user_response(question['id'], st.session_state.user_id)
+    else:
         existing_response = db.get_user_response(
             question['id'],
             st.session_state.user_id,
             st.session_state.current_session_id
         )
 
-        options = []
-        if question['option_a']:
-            options.append(('A', question['option_a']))
-        if question['option_b']:
-            options.append(('B', question['option_b']))
-        if question['option_c']:
-            options.append(('C', question['option_c']))
-        if question['option_d']:
-            options.append(('D', question['option_d']))
-
-        # Check if already answered - disable interaction if yes
-        if existing_response:
-            # Display the submitted answer (read-only)
-            st.markdown("**Your submitted answer:**")
-            submitted_answer = existing_response['answer']
-            for letter, text in options:
-                if letter == submitted_answer:
-                    st.markdown(f"**{letter}) {text}** ← Your answer")
-                else:
-                    st.markdown(f"{letter}) {text}")
-
-            # Show if correct or incorrect
-            if existing_response['is_correct']:
-                st.success("✅ Your answer is correct!")
+    options = []
+    if question['option_a']:
+        options.append(('A', question['option_a']))
+    if question['option_b']:
+        options.append(('B', question['option_b']))
+    if question['option_c']:
+        options.append(('C', question['option_c']))
+    if question['option_d']:
+        options.append(('D', question['option_d']))
+
+    # Check if already answered - disable interaction if yes
+    if existing_response:
+        # Display the submitted answer (read-only)
+        st.markdown("**Your submitted answer:**")
+        submitted_answer = existing_response['answer']
+        for letter, text in options:
+            if letter == submitted_answer:
+                st.markdown(f"**{letter}) {text}** ← Your answer")
             else:
-                st.error("❌ Your answer is incorrect")
+                st.markdown(f"{letter}) {text}")
 
-            st.info("⚠️ Answer already submitted. You cannot change your response.")
+        # Show if correct or incorrect
+        if existing_response['is_correct']:
+            st.success("✅ Your answer is correct!")
         else:
-            # Allow answering only if not yet submitted
-            option_labels = [f"{letter}) {text}" for letter, text in options]
-
-            selected = st.radio(
-                "Select your answer:",
-                option_labels,
-                index=None,
-                key=f"q_{question['id']}"
-            )
+            st.error("❌ Your answer is incorrect")
 
-            if st.button(f"Submit Answer", key=f"submit_{question['id']}", type="primary"):
-                if selected:
-                    answer_letter = selected.split(')')[0]
-                    db.submit_response(
-                        question['id'],
-                        st.session_state.user_id,
-                        st.session_state.current_session_id,
-                        answer_letter
-                    )
+        st.info("⚠️ Answer already submitted. You cannot change your response.")
+    else:
+        # Allow answering only if not yet submitted
+        option_labels = [f"{letter}) {text}" for letter, text in options]
+
+        selected = st.radio(
+            "Select your answer:",
+            option_labels,
+            index=None,
+            key=f"q_{question['id']}"
+        )
+
+        if st.button(f"Submit Answer", key=f"submit_{question['id']}", type="primary"):
+            if selected:
+                answer_letter = selected.split(')')[0]
+                try:
+                    if live:
+                        live.submit(question['id'], st.session_state.user_id, answer_letter)
+                    else:
+                        db.submit_response(
+                            question['id'],
+                            st.session_state.user_id,
+                            st.session_state.current_session_id,
+                            answer_letter
+                        )
+                except ValueError as e:
+                    st.error(str(e))
+                else:
                     st.success("✅ Answer submitted!")
                     st.rerun()
-                else:
-                    st.warning("⚠️ Please select an answer before submitting")
+            else:
+                st.warning("⚠️ Please select an answer before submitting")
 
-        st.divider()
+    st.divider()
 
 
 def main():
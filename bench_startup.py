@@ -0,0 +1,151 @@
+"""
+Start-up benchmark for the Interactive Quiz System.
+
+Measures, in fresh interpreters, the time to import app.py's module-level
+imports and the time-to-first-render of the participant path (join form) and
+the presenter path (View Results page), and which heavy packages each path
+loads beyond what Streamlit itself does.
+
+Usage:
+    python bench_startup.py                       # print timings
+    python bench_startup.py --save startup.json   # record them
+    python bench_startup.py --compare startup.json
+"""
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+
+PATHS = {
+    'participant': {'role': 'participant', 'page': None},
+    'presenter': {'role': 'presenter', 'page': 'View Results'},
+}
+
+# Packages only the presenter's results pages should load
+ANALYTICS_PACKAGES = ('pandas', 'plotly')
+
+IMPORT_SNIPPET = """
+import json, time
+start = time.perf_counter()
+import {modules}
+print(json.dumps({{"seconds": time.perf_counter() - start}}))
+"""
+
+# Modules already loaded by Streamlit and its test harness are not the app's doing
+RENDER_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+preloaded = set(sys.modules)
+at = AppTest.from_file({app!r}, default_timeout=60)
+at.session_state["user_id"] = 1
+at.session_state["user_name"] = "Benchmark"
+at.session_state["user_role"] = {role!r}
+at.run()
+if {page!r}:
+    at.sidebar.radio[0].set_value({page!r}).run()
+print(json.dumps({{
+    "seconds": time.perf_counter() - start,
+    "errors": [e.message for e in at.exception],
+    "loaded": sorted({{name.split('.')[0] for name in set(sys.modules) - preloaded}}),
+}}))
+"""
+
+
+def app_imports():
+    """Modules app.py imports at module level, i.e. what every page load pays for."""
+    with open(APP_FILE) as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            modules.append(node.module)
+    return modules
+
+
+def run_snippet(code):
+    """Run code in a fresh interpreter and return the JSON it prints last."""
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=os.path.dirname(APP_FILE),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure_imports(runs):
+    """Median time to import app.py's module-level imports over several runs."""
+    snippet = IMPORT_SNIPPET.format(modules=', '.join(app_imports()))
+    return round(statistics.median(run_snippet(snippet)['seconds'] for _ in range(runs)), 4)
+
+
+def measure(path, runs):
+    """Median first-render time of one path over several runs."""
+    spec = PATHS[path]
+    renders = [
+        run_snippet(RENDER_SNIPPET.format(app=APP_FILE, role=spec['role'], page=spec['page']))
+        for _ in range(runs)
+    ]
+    return {
+        'first_render_s': round(statistics.median(r['seconds'] for r in renders), 4),
+        'analytics_loaded': [name for name in ANALYTICS_PACKAGES if name in renders[-1]['loaded']],
+        'errors': renders[-1]['errors'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument('--save', metavar='FILE', help="write the results as JSON")
+    parser.add_argument('--compare', metavar='FILE', help="compare against saved results")
+    parser.add_argument('--tolerance', type=float, default=1.25,
+                        help="allowed slowdown factor when comparing")
+    args = parser.parse_args()
+
+    results = {'app_import_s': measure_imports(args.runs)}
+    results.update((path, measure(path, args.runs)) for path in PATHS)
+
+    print(f"app.py imports ({', '.join(app_imports())}): {results['app_import_s']:.3f}s")
+    print(f"{'path':<12} {'first render (s)':>17}  analytics loaded")
+    for path in PATHS:
+        result = results[path]
+        print(f"{path:<12} {result['first_render_s']:>17.3f}  "
+              f"{', '.join(result['analytics_loaded']) or 'none'}")
+        for error in result['errors']:
+            print(f"  ! {path} render raised: {error.splitlines()[0]}")
+
+    failures = []
+    if results['participant']['analytics_loaded']:
+        failures.append(f"participant path loaded {', '.join(results['participant']['analytics_loaded'])}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        checks = [('app_import_s', results['app_import_s'], baseline.get('app_import_s'))]
+        checks += [(f"{path} first_render_s", results[path]['first_render_s'],
+                    baseline.get(path, {}).get('first_render_s')) for path in PATHS]
+        for metric, now, before in checks:
+            if before and now > before * args.tolerance:
+                failures.append(f"{metric}: {now:.3f}s vs {before:.3f}s")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    for failure in failures:
+        print(f"✗ {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,18 @@
 """
 Database connection and operations module for the Interactive Quiz System.
 Alternative version using psycopg3 (better Windows compatibility)
+
+Every query is a module-level *_SQL constant, so query_plans.py explains
+exactly the SQL the application runs.
 """
 import psycopg
 from psycopg.rows import dict_row
+from psycopg.types.json import Jsonb
+from psycopg.conninfo import make_conninfo, conninfo_to_dict
 from contextlib import contextmanager
+import itertools
 import os
+import time
 from dotenv import load_dotenv
 import random
 import string
@@ -21,13 +28,88 @@ DB_CONFIG = {
     'password': os.getenv('DB_PASSWORD', '')
 }
 
+# Read replicas: comma-separated DSNs (e.g. "host=replica1,host=replica2 port=5433").
+# Any setting a replica DSN leaves out is taken from DB_CONFIG.
+DB_REPLICAS = [
+    make_conninfo(make_conninfo(**DB_CONFIG), **conninfo_to_dict(dsn.strip()))
+    for dsn in os.getenv('DB_REPLICAS', '').split(',')
+    if dsn.strip()
+]
+# Seconds a replica that failed to connect is skipped before being retried
+REPLICA_RETRY_SECONDS = float(os.getenv('DB_REPLICA_RETRY_SECONDS', '30'))
+# Seconds to wait for a replica to accept a connection before failing over
+REPLICA_CONNECT_TIMEOUT = int(os.getenv('DB_REPLICA_CONNECT_TIMEOUT', '2'))
+
+_replica_cycle = itertools.cycle(range(len(DB_REPLICAS))) if DB_REPLICAS else None
+_replica_down_until = {}
+# Latest primary WAL position written on behalf of each user (read-your-own-writes)
+_user_write_lsn = {}
+# user_id -> name; names never change, so results pages need not join users
+_user_names = {}
+
+
+def _connect_replica(min_lsn=None):
+    """Connect to the next healthy replica that has replayed up to min_lsn.
+
+    Returns None when no replica is configured, reachable and caught up.
+    """
+    if not DB_REPLICAS:
+        return None
+    start = next(_replica_cycle)
+    for offset in range(len(DB_REPLICAS)):
+        dsn = DB_REPLICAS[(start + offset) % len(DB_REPLICAS)]
+        if _replica_down_until.get(dsn, 0) > time.monotonic():
+            continue
+        try:
+            conn = psycopg.connect(dsn, connect_timeout=REPLICA_CONNECT_TIMEOUT)
+        except psycopg.OperationalError:
+            _replica_down_until[dsn] = time.monotonic() + REPLICA_RETRY_SECONDS
+            continue
+        if min_lsn is not None:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        "SELECT COALESCE(pg_last_wal_replay_lsn() >= %s::pg_lsn, TRUE)",
+                        (min_lsn,)
+                    )
+                    caught_up = cur.fetchone()[0]
+            except psycopg.Error:
+                caught_up = False
+            if not caught_up:
+                conn.close()
+                continue
+        return conn
+    return None
+
+
+def _record_user_write(conn, user_id):
+    """Remember the primary's WAL position after a write made for user_id.
+
+    Must be called after the write has been committed on conn. Without replicas
+    every read goes to the primary, so there is nothing to track.
+    """
+    if not DB_REPLICAS:
+        return
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_current_wal_lsn()::text")
+        _user_write_lsn[user_id] = cur.fetchone()[0]
+
 
 @contextmanager
-def get_db_connection():
-    """Context manager for database connections."""
+def get_db_connection(read_only=False, user_id=None):
+    """Context manager for database connections.
+
+    Writes always go to the primary. With read_only=True the connection comes
+    from a read replica when one is available, falling back to the primary.
+    Passing user_id makes sure the replica has already replayed that user's
+    latest write, so users always see their own submissions.
+    """
     conn = None
     try:
-        conn = psycopg.connect(**DB_CONFIG)
+        if read_only:
+            conn = _connect_replica(_user_write_lsn.get(user_id))
+        if conn is None:
+            conn = psycopg.connect(**DB_CONFIG)
         yield conn
         conn.commit()
     except Exception as e:
@@ -45,149 +127,355 @@ def generate_session_code():
 
 
 # User operations
+CREATE_USER_SQL = "INSERT INTO users (name, role) VALUES (%s, %s) RETURNING id, name, role"
+
+
 def create_user(name, role='participant'):
     """Create a new user."""
     with get_db_connection() as conn:
         with conn.cursor(row_factory=dict_row) as cur:
-            cur.execute(
-                "INSERT INTO users (name, role) VALUES (%s, %s) RETURNING id, name, role",
-                (name, role)
-            )
-            return cur.fetchone()
+            cur.execute(CREATE_USER_SQL, (name, role))
+            user = cur.fetchone()
+            _user_names[user['id']] = user['name']
+            return user
+
+
+RESOLVE_USER_SQL = """INSERT INTO users (name, role, device_token) VALUES (%s, %s, %s)
+                      ON CONFLICT (name, role, device_token) DO UPDATE SET name = EXCLUDED.name
+                      RETURNING id, name, role"""
+
+
+def resolve_user(name, role, device_token):
+    """Get the user for a name, role and device token, creating it on first login."""
+    with get_db_connection() as conn:
+        with conn.cursor(row_factory=dict_row) as cur:
+            # DO UPDATE (a no-op) rather than DO NOTHING so RETURNING yields the existing row
+            cur.execute(RESOLVE_USER_SQL, (name, role, device_token))
+            user = cur.fetchone()
+            _user_names[user['id']] = user['name']
+            return user
+
+
+GET_USER_BY_ID_SQL = "SELECT * FROM users WHERE id = %s"
 
 
 def get_user_by_id(user_id):
     """Get user by ID."""
-    with get_db_connection() as conn:
+    with get_db_connection(read_only=True) as conn:
         with conn.cursor(row_factory=dict_row) as cur:
-            cur.execute("SELECT * FROM users WHERE id = %s", (user_id,))
+            cur.execute(GET_USER_BY_ID_SQL, (user_id,))
             result = cur.fetchone()
             return result if result else None
 
 
+GET_USER_NAMES_SQL = "SELECT id, name FROM users WHERE id = ANY(%s)"
+
+
+def get_user_names(user_ids):
+    """Get {user_id: name} for the given users, from the process cache where possible."""
+    missing = [user_id for user_id in set(user_ids) if user_id not in _user_names]
+    if missing:
+        with get_db_connection(read_only=True) as conn:
+            with conn.cursor() as cur:
+                cur.execute(GET_USER_NAMES_SQL, (missing,))
+                _user_names.update(cur.fetchall())
+    return {user_id: _user_names.get(user_id) for user_id in user_ids}
+
+
 # Quiz operations
+CREATE_QUIZ_SQL = "INSERT INTO quizzes (title, created_by) VALUES (%s, %s) RETURNING id, title, created_at"
+
+
 def create_quiz(title, created_by):
     """Create a new quiz."""
     with get_db_connection() as conn:
         with conn.cursor(row_factory=dict_row) as cur:
-            cur.execute(
-                "INSERT INTO quizzes (title, created_by) VALUES (%s, %s) RETURNING id, title, created_at",
-                (title, created_by)
-            )
+            cur.execute(CREATE_QUIZ_SQL, (title, created_by))
             return cur.fetchone()
 
 
+GET_ALL_QUIZZES_SQL = "SELECT * FROM quizzes ORDER BY created_at DESC"
+
+
 def get_all_quizzes():
     """Get all quizzes."""
-    with get_db_connection() as conn:
+    with get_db_connection(read_only=True) as conn:
         with conn.cursor(row_factory=dict_row) as cur:
-            cur.execute("SELECT * FROM quizzes ORDER BY created_at DESC")
+            cur.execute(GET_ALL_QUIZZES_SQL)
             return cur.fetchall()
 
 
+GET_QUIZ_BY_ID_SQL = "SELECT * FROM quizzes WHERE id = %s"
+
+
 def get_quiz_by_id(quiz_id):
     """Get quiz by ID."""
-    with get_db_connection() as conn:
-        with conn.cursor(row_factory=dict_row) as cur:
-            cur.execute("SELECT * FROM quizzes WHERE id = %s", (quiz_id,))
-            result = cur.fetchone()
-            return result if result else None
+    # A quiz is usually opened right after it is created, so a miss on a
+    # lagging replica is retried on the primary.
+    for read_only in (True, False):
+        with get_db_connection(read_only=read_only) as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                cur.execute(GET_QUIZ_BY_ID_SQL, (quiz_id,))
+                result = cur.fetchone()
+                if result or not DB_REPLICAS:
+                    return result if result else None
+    return None
 
 
 # Question operations
+ADD_QUESTION_SQL = """INSERT INTO questions (quiz_id, text, option_a, option_b, option_c, option_d, correct_answer)
+                      VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING id"""
+
+
 def add_question(quiz_id, text, option_a, option_b, option_c, option_d, correct_answer):
     """Add a question to a quiz."""
     with get_db_connection() as conn:
         with conn.cursor(row_factory=dict_row) as cur:
             cur.execute(
-                """INSERT INTO questions (quiz_id, text, option_a, option_b, option_c, option_d, correct_answer)
-                   VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING id""",
+                ADD_QUESTION_SQL,
                 (quiz_id, text, option_a, option_b, option_c, option_d, correct_answer)
             )
             return cur.fetchone()['id']
 
 
+GET_QUESTIONS_BY_QUIZ_SQL = "SELECT * FROM questions WHERE quiz_id = %s ORDER BY id"
+
+
 def get_questions_by_quiz(quiz_id):
     """Get all questions for a quiz."""
-    with get_db_connection() as conn:
+    with get_db_connection(read_only=True) as conn:
         with conn.cursor(row_factory=dict_row) as cur:
-            cur.execute("SELECT * FROM questions WHERE quiz_id = %s ORDER BY id", (quiz_id,))
+            cur.execute(GET_QUESTIONS_BY_QUIZ_SQL, (quiz_id,))
             return cur.fetchall()
 
 
+GET_QUESTION_BY_ID_SQL = "SELECT * FROM questions WHERE id = %s"
+
+
 def get_question_by_id(question_id):
     """Get question by ID."""
-    with get_db_connection() as conn:
+    with get_db_connection(read_only=True) as conn:
         with conn.cursor(row_factory=dict_row) as cur:
-            cur.execute("SELECT * FROM questions WHERE id = %s", (question_id,))
+            cur.execute(GET_QUESTION_BY_ID_SQL, (question_id,))
             result = cur.fetchone()
             return result if result else None
 
 
 # Session operations
-def create_session(quiz_id):
-    """Create a new quiz session with a unique code."""
+CREATE_SESSION_SQL = "INSERT INTO sessions (quiz_id, session_code, paced) VALUES (%s, %s, %s) RETURNING id, session_code"
+
+
+def create_session(quiz_id, paced=False, user_id=None):
+    """Create a new quiz session with a unique code.
+
+    In a paced session participants only see the question the presenter has
+    made current (see set_current_question). Passing the presenter's user_id
+    lets their next reads see the new session.
+    """
     session_code = generate_session_code()
     with get_db_connection() as conn:
         with conn.cursor(row_factory=dict_row) as cur:
             # Ensure unique session code
             while True:
                 try:
-                    cur.execute(
-                        "INSERT INTO sessions (quiz_id, session_code) VALUES (%s, %s) RETURNING id, session_code",
-                        (quiz_id, session_code)
-                    )
+                    cur.execute(CREATE_SESSION_SQL, (quiz_id, session_code, paced))
                     conn.commit()
-                    return cur.fetchone()
+                    session = cur.fetchone()
+                    if user_id is not None:
+                        _record_user_write(conn, user_id)
+                    return session
                 except psycopg.errors.UniqueViolation:
                     session_code = generate_session_code()
                     conn.rollback()
 
 
-def get_session_by_code(session_code):
-    """Get session by code."""
-    with get_db_connection() as conn:
+GET_SESSION_BY_CODE_SQL = "SELECT * FROM sessions WHERE session_code = %s"
+
+
+def get_session_by_code(session_code, user_id=None):
+    """Get session by code (reflecting user_id's own session changes)."""
+    # Participants join with a code moments after it is created, so a miss
+    # on a lagging replica is retried on the primary.
+    for read_only in (True, False):
+        with get_db_connection(read_only=read_only, user_id=user_id) as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                cur.execute(GET_SESSION_BY_CODE_SQL, (session_code,))
+                result = cur.fetchone()
+                if result or not DB_REPLICAS:
+                    return result if result else None
+    return None
+
+
+GET_SESSION_BY_ID_SQL = "SELECT * FROM sessions WHERE id = %s"
+
+
+def get_session_by_id(session_id):
+    """Get session by ID."""
+    with get_db_connection(read_only=True) as conn:
         with conn.cursor(row_factory=dict_row) as cur:
-            cur.execute("SELECT * FROM sessions WHERE session_code = %s", (session_code,))
+            cur.execute(GET_SESSION_BY_ID_SQL, (session_id,))
             result = cur.fetchone()
             return result if result else None
 
 
-def get_active_sessions():
-    """Get all active sessions."""
-    with get_db_connection() as conn:
+IS_SESSION_ACTIVE_SQL = "SELECT is_active FROM sessions WHERE id = %s"
+
+
+def is_session_active(session_id):
+    """Check whether a session is still active (read from a replica, so it may lag)."""
+    with get_db_connection(read_only=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute(IS_SESSION_ACTIVE_SQL, (session_id,))
+            result = cur.fetchone()
+            return bool(result and result[0])
+
+
+GET_ACTIVE_SESSIONS_SQL = """SELECT s.*, q.title as quiz_title
+                             FROM sessions s
+                             JOIN quizzes q ON s.quiz_id = q.id
+                             WHERE s.is_active = TRUE
+                             ORDER BY s.created_at DESC"""
+
+
+def get_active_sessions(user_id=None):
+    """Get all active sessions (reflecting user_id's own session changes)."""
+    with get_db_connection(read_only=True, user_id=user_id) as conn:
         with conn.cursor(row_factory=dict_row) as cur:
-            cur.execute(
-                """SELECT s.*, q.title as quiz_title
-                   FROM sessions s
-                   JOIN quizzes q ON s.quiz_id = q.id
-                   WHERE s.is_active = TRUE
-                   ORDER BY s.created_at DESC"""
-            )
+            cur.execute(GET_ACTIVE_SESSIONS_SQL)
             return cur.fetchall()
 
 
-def end_session(session_id):
-    """End a quiz session."""
+GET_ENDED_SESSIONS_SQL = """SELECT s.*, q.title as quiz_title
+                            FROM sessions s
+                            JOIN quizzes q ON s.quiz_id = q.id
+                            WHERE s.is_active = FALSE
+                            ORDER BY s.ended_at DESC NULLS LAST
+                            LIMIT %s"""
+
+
+def get_ended_sessions(limit=50, user_id=None):
+    """Get the most recently ended sessions (reflecting user_id's own session changes)."""
+    with get_db_connection(read_only=True, user_id=user_id) as conn:
+        with conn.cursor(row_factory=dict_row) as cur:
+            cur.execute(GET_ENDED_SESSIONS_SQL, (limit,))
+            return cur.fetchall()
+
+
+END_SESSION_SQL = "UPDATE sessions SET is_active = FALSE, ended_at = CURRENT_TIMESTAMP WHERE id = %s"
+
+
+def end_session(session_id, user_id=None):
+    """End a quiz session (user_id: the presenter, for read-your-own-writes)."""
     with get_db_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(
-                "UPDATE sessions SET is_active = FALSE, ended_at = CURRENT_TIMESTAMP WHERE id = %s",
-                (session_id,)
-            )
+            cur.execute(END_SESSION_SQL, (session_id,))
+        if user_id is not None:
+            conn.commit()
+            _record_user_write(conn, user_id)
+
+
+# A correlated LIMIT 1 subquery rather than NOT EXISTS: the planner may turn an
+# anti-join into a scan of every response, while this probes each active
+# session's responses through the index
+EXPIRE_IDLE_SESSIONS_SQL = """UPDATE sessions s SET is_active = FALSE, ended_at = CURRENT_TIMESTAMP
+                              WHERE s.is_active = TRUE
+                                AND s.created_at < LOCALTIMESTAMP - make_interval(mins => %s)
+                                AND (SELECT 1 FROM responses r
+                                     WHERE r.session_id = s.id
+                                       AND r.submitted_at >= LOCALTIMESTAMP - make_interval(mins => %s)
+                                     LIMIT 1) IS NULL
+                              RETURNING s.id"""
+
+
+def expire_idle_sessions(idle_minutes):
+    """End active sessions with no activity for idle_minutes and return their IDs."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(EXPIRE_IDLE_SESSIONS_SQL, (idle_minutes, idle_minutes))
+            return [row[0] for row in cur.fetchall()]
+
+
+SET_CURRENT_QUESTION_SQL = "UPDATE sessions SET current_question_id = %s WHERE id = %s"
+
+
+def set_current_question(session_id, question_id, user_id=None):
+    """Make a question the current one of a paced session (None clears it).
+
+    user_id is the presenter, for read-your-own-writes.
+    """
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(SET_CURRENT_QUESTION_SQL, (question_id, session_id))
+        if user_id is not None:
+            conn.commit()
+            _record_user_write(conn, user_id)
+
+
+GET_NEXT_QUESTION_ID_SQL = """SELECT id FROM questions
+                              WHERE quiz_id = %s AND id > %s
+                              ORDER BY id LIMIT 1"""
+
+
+def get_next_question_id(quiz_id, question_id=None):
+    """Get the ID of the question after question_id (the first one when None)."""
+    with get_db_connection(read_only=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute(GET_NEXT_QUESTION_ID_SQL, (quiz_id, question_id or 0))
+            result = cur.fetchone()
+            return result[0] if result else None
+
+
+GET_PREVIOUS_QUESTION_ID_SQL = """SELECT id FROM questions
+                                  WHERE quiz_id = %s AND id < %s
+                                  ORDER BY id DESC LIMIT 1"""
+
+
+def get_previous_question_id(quiz_id, question_id):
+    """Get the ID of the question before question_id."""
+    with get_db_connection(read_only=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute(GET_PREVIOUS_QUESTION_ID_SQL, (quiz_id, question_id))
+            result = cur.fetchone()
+            return result[0] if result else None
+
+
+GET_QUESTION_NUMBER_SQL = "SELECT COUNT(*) FROM questions WHERE quiz_id = %s AND id <= %s"
+
+
+def get_question_number(quiz_id, question_id):
+    """Get the 1-based position of a question within its quiz."""
+    with get_db_connection(read_only=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute(GET_QUESTION_NUMBER_SQL, (quiz_id, question_id))
+            return cur.fetchone()[0]
 
 
 # Response operations
+LOCK_ACTIVE_SESSION_SQL = "SELECT is_active FROM sessions WHERE id = %s FOR SHARE"
+GET_RESPONSE_ID_SQL = """SELECT id FROM responses
+                         WHERE question_id = %s AND user_id = %s AND session_id = %s"""
+GET_CORRECT_ANSWER_SQL = "SELECT correct_answer FROM questions WHERE id = %s"
+INSERT_RESPONSE_SQL = """INSERT INTO responses (question_id, user_id, session_id, answer, is_correct)
+                         VALUES (%s, %s, %s, %s, %s)
+                         RETURNING id"""
+
+
 def submit_response(question_id, user_id, session_id, answer):
-    """Submit a response to a question. Once submitted, it cannot be changed."""
+    """Submit a response to a question. Once submitted, it cannot be changed.
+
+    Answers are only accepted while the session is active, so the summary
+    stored when it ends stays complete.
+    """
     with get_db_connection() as conn:
         with conn.cursor(row_factory=dict_row) as cur:
+            # Lock the session row so it cannot be ended before this insert commits
+            cur.execute(LOCK_ACTIVE_SESSION_SQL, (session_id,))
+            session = cur.fetchone()
+            if session is None or not session['is_active']:
+                raise ValueError("This session has ended. Answers are no longer accepted.")
+
             # Check if response already exists
-            cur.execute(
-                """SELECT id FROM responses
-                   WHERE question_id = %s AND user_id = %s AND session_id = %s""",
-                (question_id, user_id, session_id)
-            )
+            cur.execute(GET_RESPONSE_ID_SQL, (question_id, user_id, session_id))
             existing = cur.fetchone()
 
             if existing:
@@ -195,74 +483,186 @@ def submit_response(question_id, user_id, session_id, answer):
                 raise ValueError("Answer already submitted. Cannot modify response.")
 
             # Get correct answer
-            cur.execute("SELECT correct_answer FROM questions WHERE id = %s", (question_id,))
+            cur.execute(GET_CORRECT_ANSWER_SQL, (question_id,))
             correct = cur.fetchone()['correct_answer']
             is_correct = (answer == correct)
 
             # Insert response (only if doesn't exist)
-            cur.execute(
-                """INSERT INTO responses (question_id, user_id, session_id, answer, is_correct)
-                   VALUES (%s, %s, %s, %s, %s)
-                   RETURNING id""",
-                (question_id, user_id, session_id, answer, is_correct)
-            )
-            return cur.fetchone()['id']
+            cur.execute(INSERT_RESPONSE_SQL, (question_id, user_id, session_id, answer, is_correct))
+            response_id = cur.fetchone()['id']
+            conn.commit()
+            _record_user_write(conn, user_id)
+            return response_id
+
+
+GET_RESPONSES_BY_SESSION_SQL = """SELECT r.*, q.text as question_text
+                                  FROM responses r
+                                  JOIN questions q ON r.question_id = q.id
+                                  WHERE r.session_id = %s
+                                  ORDER BY r.submitted_at"""
 
 
 def get_responses_by_session(session_id):
     """Get all responses for a session."""
-    with get_db_connection() as conn:
+    with get_db_connection(read_only=True) as conn:
         with conn.cursor(row_factory=dict_row) as cur:
-            cur.execute(
-                """SELECT r.*, u.name as user_name, q.text as question_text
-                   FROM responses r
-                   JOIN users u ON r.user_id = u.id
-                   JOIN questions q ON r.question_id = q.id
-                   WHERE r.session_id = %s
-                   ORDER BY r.submitted_at""",
-                (session_id,)
-            )
+            cur.execute(GET_RESPONSES_BY_SESSION_SQL, (session_id,))
+            responses = cur.fetchall()
+    names = get_user_names([r['user_id'] for r in responses])
+    for response in responses:
+        response['user_name'] = names[response['user_id']]
+    return responses
+
+
+GET_SESSION_ANSWERS_SQL = """SELECT question_id, user_id, answer
+                             FROM responses
+                             WHERE session_id = %s"""
+
+
+def get_session_answers(session_id):
+    """Get (question_id, user_id, answer) of every response in a session."""
+    with get_db_connection(read_only=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute(GET_SESSION_ANSWERS_SQL, (session_id,))
             return cur.fetchall()
 
 
+GET_QUESTION_RESULTS_SQL = """SELECT answer, COUNT(*) as count
+                              FROM responses
+                              WHERE question_id = %s AND session_id = %s
+                              GROUP BY answer
+                              ORDER BY answer"""
+
+
 def get_question_results(question_id, session_id):
     """Get aggregated results for a specific question in a session."""
-    with get_db_connection() as conn:
+    with get_db_connection(read_only=True) as conn:
         with conn.cursor(row_factory=dict_row) as cur:
-            cur.execute(
-                """SELECT answer, COUNT(*) as count
-                   FROM responses
-                   WHERE question_id = %s AND session_id = %s
-                   GROUP BY answer
-                   ORDER BY answer""",
-                (question_id, session_id)
-            )
+            cur.execute(GET_QUESTION_RESULTS_SQL, (question_id, session_id))
             return cur.fetchall()
 
 
+GET_QUESTION_RESPONSES_DETAILED_SQL = """SELECT answer, user_id, is_correct, submitted_at
+                                         FROM responses
+                                         WHERE question_id = %s AND session_id = %s
+                                         ORDER BY answer, submitted_at"""
+
+
 def get_question_responses_detailed(question_id, session_id):
     """Get detailed responses for a specific question showing participant names."""
-    with get_db_connection() as conn:
+    with get_db_connection(read_only=True) as conn:
         with conn.cursor(row_factory=dict_row) as cur:
-            cur.execute(
-                """SELECT r.answer, u.name as participant_name, r.is_correct, r.submitted_at
-                   FROM responses r
-                   JOIN users u ON r.user_id = u.id
-                   WHERE r.question_id = %s AND r.session_id = %s
-                   ORDER BY r.answer, r.submitted_at""",
-                (question_id, session_id)
-            )
-            return cur.fetchall()
+            cur.execute(GET_QUESTION_RESPONSES_DETAILED_SQL, (question_id, session_id))
+            responses = cur.fetchall()
+    names = get_user_names([r['user_id'] for r in responses])
+    for response in responses:
+        response['participant_name'] = names[response['user_id']]
+    return responses
+
+
+GET_USER_RESPONSE_SQL = """SELECT * FROM responses
+                           WHERE question_id = %s AND user_id = %s AND session_id = %s"""
 
 
 def get_user_response(question_id, user_id, session_id):
     """Check if user has already answered a question in this session."""
+    with get_db_connection(read_only=True, user_id=user_id) as conn:
+        with conn.cursor(row_factory=dict_row) as cur:
+            cur.execute(GET_USER_RESPONSE_SQL, (question_id, user_id, session_id))
+            result = cur.fetchone()
+            return result if result else None
+
+
+# Summary operations
+GET_UNSUMMARIZED_SESSIONS_SQL = """SELECT id FROM sessions
+                                   WHERE NOT is_active AND summarized_at IS NULL
+                                   ORDER BY id
+                                   LIMIT %s"""
+
+
+def get_unsummarized_sessions(limit=100):
+    """Get IDs of ended sessions whose summary has not been computed yet."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(GET_UNSUMMARIZED_SESSIONS_SQL, (limit,))
+            return [row[0] for row in cur.fetchall()]
+
+
+SESSION_ANSWER_TALLIES_SQL = """SELECT question_id, answer, COUNT(*)
+                                FROM responses
+                                WHERE session_id = %s
+                                GROUP BY question_id, answer"""
+SESSION_SCORES_SQL = """SELECT user_id, COUNT(*) FILTER (WHERE is_correct), COUNT(*)
+                        FROM responses
+                        WHERE session_id = %s
+                        GROUP BY user_id"""
+UPSERT_SESSION_SUMMARY_SQL = """INSERT INTO session_summaries
+                                    (session_id, participant_count, response_count, question_tallies,
+                                     score_distribution, leaderboard)
+                                VALUES (%s, %s, %s, %s, %s, %s)
+                                ON CONFLICT (session_id) DO UPDATE SET
+                                    participant_count = EXCLUDED.participant_count,
+                                    response_count = EXCLUDED.response_count,
+                                    question_tallies = EXCLUDED.question_tallies,
+                                    score_distribution = EXCLUDED.score_distribution,
+                                    leaderboard = EXCLUDED.leaderboard,
+                                    computed_at = CURRENT_TIMESTAMP
+                                RETURNING *"""
+MARK_SESSION_SUMMARIZED_SQL = "UPDATE sessions SET summarized_at = CURRENT_TIMESTAMP WHERE id = %s"
+
+
+def materialize_session_summary(session_id, leaderboard_size=10):
+    """Compute, store and return the results summary of a session.
+
+    The summary holds per-question answer tallies, the score distribution and a
+    leaderboard snapshot, so historical results need not touch responses again.
+    """
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(SESSION_ANSWER_TALLIES_SQL, (session_id,))
+            tallies = {}
+            for question_id, answer, count in cur.fetchall():
+                tallies.setdefault(str(question_id), {})[answer] = count
+
+            cur.execute(SESSION_SCORES_SQL, (session_id,))
+            scores = cur.fetchall()
+
+    distribution = {}
+    for _, score, _ in scores:
+        distribution[score] = distribution.get(score, 0) + 1
+    names = get_user_names([user_id for user_id, _, _ in scores])
+    leaderboard = sorted(
+        ({'user_id': user_id, 'name': names[user_id], 'score': score, 'answered': answered}
+         for user_id, score, answered in scores),
+        key=lambda entry: (-entry['score'], entry['name'] or '')
+    )[:leaderboard_size]
+
     with get_db_connection() as conn:
         with conn.cursor(row_factory=dict_row) as cur:
             cur.execute(
-                """SELECT * FROM responses
-                   WHERE question_id = %s AND user_id = %s AND session_id = %s""",
-                (question_id, user_id, session_id)
+                UPSERT_SESSION_SUMMARY_SQL,
+                (
+                    session_id,
+                    len(scores),
+                    sum(answered for _, _, answered in scores),
+                    Jsonb(tallies),
+                    Jsonb([{'score': score, 'count': count}
+                           for score, count in sorted(distribution.items())]),
+                    Jsonb(leaderboard),
+                )
             )
+            summary = cur.fetchone()
+            cur.execute(MARK_SESSION_SUMMARIZED_SQL, (session_id,))
+            return summary
+
+
+GET_SESSION_SUMMARY_SQL = "SELECT * FROM session_summaries WHERE session_id = %s"
+
+
+def get_session_summary(session_id):
+    """Get the stored results summary of a session."""
+    with get_db_connection(read_only=True) as conn:
+        with conn.cursor(row_factory=dict_row) as cur:
+            cur.execute(GET_SESSION_SUMMARY_SQL, (session_id,))
             result = cur.fetchone()
             return result if result else None
@@ -0,0 +1,123 @@
+"""
+Duplicate-user compaction job for the Interactive Quiz System.
+
+Before logins were resolved by device token, every login inserted a new users
+row. This job merges those legacy rows (no device token) that share a name and
+role into one user, moving their responses and quizzes along.
+
+Users with the same name who answered in the same session are different people
+and are never merged.
+
+Usage:
+    python dedupe_users.py           # report what would be merged
+    python dedupe_users.py --apply   # migrate, merge and delete the duplicates
+
+--apply first runs migrate.sql, which adds the device_token column these
+databases predate; the dry run leaves the schema untouched.
+"""
+import argparse
+import os
+import sys
+
+import psycopg
+
+from database import DB_CONFIG
+
+MIGRATION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrate.sql')
+
+
+def has_device_tokens(conn):
+    """Whether the users table already has the device_token column."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """SELECT 1 FROM information_schema.columns
+               WHERE table_schema = current_schema() AND table_name = 'users'
+                 AND column_name = 'device_token'"""
+        )
+        return cur.fetchone() is not None
+
+
+def find_merges(conn):
+    """Return {duplicate user_id: user_id it is merged into}."""
+    # Before the migration every row is a legacy row
+    legacy = "device_token IS NULL" if has_device_tokens(conn) else "TRUE"
+    legacy_u = "u.device_token IS NULL" if legacy != "TRUE" else "TRUE"
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""SELECT u.id, u.name, u.role,
+                       ARRAY_REMOVE(ARRAY_AGG(DISTINCT r.session_id), NULL)
+                FROM users u
+                LEFT JOIN responses r ON r.user_id = u.id
+                WHERE {legacy_u}
+                  AND (u.name, u.role) IN (
+                      SELECT name, role FROM users
+                      WHERE {legacy}
+                      GROUP BY name, role
+                      HAVING COUNT(*) > 1)
+                GROUP BY u.id
+                ORDER BY u.name, u.role, u.id"""
+        )
+        rows = cur.fetchall()
+
+    merges = {}
+    group = None
+    keepers = []
+    for user_id, name, role, sessions in rows:
+        if (name, role) != group:
+            group = (name, role)
+            keepers = []
+        sessions = set(sessions)
+        # The oldest row whose sessions don't overlap this one absorbs it
+        for keeper_id, keeper_sessions in keepers:
+            if keeper_sessions.isdisjoint(sessions):
+                merges[user_id] = keeper_id
+                keeper_sessions |= sessions
+                break
+        else:
+            keepers.append((user_id, sessions))
+    return merges
+
+
+def apply_merges(conn, merges):
+    """Point responses and quizzes at the kept users and delete the duplicates."""
+    with conn.cursor() as cur:
+        cur.execute("CREATE TEMP TABLE user_merges (old_id INTEGER PRIMARY KEY, new_id INTEGER) ON COMMIT DROP")
+        with cur.copy("COPY user_merges (old_id, new_id) FROM STDIN") as copy:
+            for old_id, new_id in merges.items():
+                copy.write_row((old_id, new_id))
+        cur.execute(
+            "UPDATE responses r SET user_id = m.new_id FROM user_merges m WHERE r.user_id = m.old_id"
+        )
+        responses = cur.rowcount
+        cur.execute(
+            "UPDATE quizzes q SET created_by = m.new_id FROM user_merges m WHERE q.created_by = m.old_id"
+        )
+        quizzes = cur.rowcount
+        cur.execute("DELETE FROM users u USING user_merges m WHERE u.id = m.old_id")
+        users = cur.rowcount
+    return users, responses, quizzes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dbname', default=DB_CONFIG['dbname'], help="database to compact")
+    parser.add_argument('--apply', action='store_true', help="perform the merge (default: dry run)")
+    args = parser.parse_args()
+
+    with psycopg.connect(**dict(DB_CONFIG, dbname=args.dbname)) as conn:
+        merges = find_merges(conn)
+        kept = len(set(merges.values()))
+        print(f"{len(merges)} duplicate users to merge into {kept} users")
+        if not args.apply:
+            if merges:
+                print("Dry run; rerun with --apply to merge")
+            return 0
+        with open(MIGRATION_FILE) as f:
+            conn.execute(f.read())
+        users, responses, quizzes = apply_merges(conn, merges) if merges else (0, 0, 0)
+    print(f"Deleted {users} users, moved {responses} responses and {quizzes} quizzes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
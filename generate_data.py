@@ -0,0 +1,329 @@
+"""
+Synthetic data generator for large-scale testing of the Interactive Quiz System.
+
+Writes users, quizzes, questions, sessions and responses straight into
+PostgreSQL with COPY. The same --seed always produces the same data.
+
+Usage:
+    python generate_data.py --quizzes 5000 --sessions 20000 --seed 42
+    python generate_data.py --reset   # reload schema.sql first
+
+The target (default: <DB_NAME>_load) must already exist and is refused when it
+is the application database.
+"""
+import argparse
+import math
+import os
+import random
+import string
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import psycopg
+
+from database import DB_CONFIG
+
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema.sql')
+
+# Rows buffered before each write to the COPY stream
+CHUNK_ROWS = 10000
+
+ANSWERS = 'ABCD'
+CODE_ALPHABET = string.digits + string.ascii_uppercase
+
+
+def session_code(n):
+    """Deterministic 7-character code; app codes are 6 characters, so they never clash."""
+    digits = []
+    for _ in range(6):
+        n, r = divmod(n, 36)
+        digits.append(CODE_ALPHABET[r])
+    return 'G' + ''.join(reversed(digits))
+
+
+def clamp(value, low, high):
+    return max(low, min(high, value))
+
+
+class Generator:
+    """Streams synthetic rows into the database, assigning parent-table ids itself."""
+
+    def __init__(self, conn, args):
+        self.conn = conn
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.counts = {}
+        # quiz id -> [(question id, number of options, correct answer)]
+        self.quiz_questions = {}
+        self.presenter_ids = []
+        self.participant_ids = []
+        self.epoch = datetime(2025, 1, 1) if args.epoch is None else args.epoch
+
+    def next_ids(self, table):
+        """First free id of a table; tables are locked, so nothing else can take it."""
+        with self.conn.cursor() as cur:
+            cur.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}")
+            return cur.fetchone()[0]
+
+    def copy(self, table, columns, rows):
+        """COPY an iterable of already tab-separated lines into a table."""
+        count = 0
+        with self.conn.cursor() as cur:
+            with cur.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+                chunk = []
+                for line in rows:
+                    chunk.append(line)
+                    if len(chunk) >= CHUNK_ROWS:
+                        copy.write('\n'.join(chunk) + '\n')
+                        count += len(chunk)
+                        chunk = []
+                if chunk:
+                    copy.write('\n'.join(chunk) + '\n')
+                    count += len(chunk)
+        self.counts[table] = count
+
+    def users(self):
+        first_id = self.next_ids('users')
+        n_presenters = self.args.presenters
+        n_participants = self.args.users
+        self.presenter_ids = list(range(first_id, first_id + n_presenters))
+        self.participant_ids = list(range(first_id + n_presenters,
+                                          first_id + n_presenters + n_participants))
+
+        def rows():
+            for i, user_id in enumerate(self.presenter_ids, 1):
+                yield f"{user_id}\tPresenter {i}\tpresenter\t{self.epoch}"
+            for i, user_id in enumerate(self.participant_ids, 1):
+                yield f"{user_id}\tParticipant {i}\tparticipant\t{self.epoch}"
+
+        self.copy('users', ('id', 'name', 'role', 'created_at'), rows())
+
+    def quizzes(self):
+        first_id = self.next_ids('quizzes')
+        rng = self.rng
+        span = self.args.days * 86400
+
+        def rows():
+            for i in range(self.args.quizzes):
+                quiz_id = first_id + i
+                self.quiz_questions[quiz_id] = []
+                created = self.epoch + timedelta(seconds=rng.random() * span)
+                yield f"{quiz_id}\tQuiz {i + 1}\t{rng.choice(self.presenter_ids)}\t{created}"
+
+        self.copy('quizzes', ('id', 'title', 'created_by', 'created_at'), rows())
+
+    def questions(self):
+        next_id = self.next_ids('questions')
+        rng = self.rng
+        low, high = self.args.questions_per_quiz
+
+        def rows():
+            nonlocal next_id
+            for quiz_id, questions in self.quiz_questions.items():
+                for n in range(1, rng.randint(low, high) + 1):
+                    options = 4 if rng.random() >= self.args.short_question_fraction else rng.randint(2, 3)
+                    correct = ANSWERS[rng.randrange(options)]
+                    questions.append((next_id, options, correct))
+                    option_c = 'Option C' if options > 2 else '\\N'
+                    option_d = 'Option D' if options > 3 else '\\N'
+                    yield (f"{next_id}\t{quiz_id}\tQuestion {n} of quiz {quiz_id}\t"
+                           f"Option A\tOption B\t{option_c}\t{option_d}\t{correct}\t{self.epoch}")
+                    next_id += 1
+
+        self.copy('questions', ('id', 'quiz_id', 'text', 'option_a', 'option_b', 'option_c',
+                                'option_d', 'correct_answer', 'created_at'), rows())
+
+    def sessions_and_responses(self):
+        """Generate sessions, then stream every participant's answers for each of them."""
+        args = self.args
+        rng = self.rng
+        first_id = self.next_ids('sessions')
+        span = args.days * 86400
+        quiz_ids = [quiz_id for quiz_id, questions in self.quiz_questions.items() if questions]
+        if not quiz_ids:
+            raise SystemExit("No quiz has questions; raise --questions-per-quiz")
+
+        sessions = []
+        for i in range(args.sessions):
+            session_id = first_id + i
+            quiz_id = rng.choice(quiz_ids)
+            started = self.epoch + timedelta(seconds=int(rng.random() * span))
+            active = rng.random() < args.active_fraction
+            sessions.append((session_id, quiz_id, started, active))
+
+        def session_rows():
+            for session_id, quiz_id, started, active in sessions:
+                length = len(self.quiz_questions[quiz_id]) * args.question_interval
+                ended = '\\N' if active else started + timedelta(seconds=length + 60)
+                yield (f"{session_id}\t{quiz_id}\t{session_code(session_id)}\t"
+                       f"{'t' if active else 'f'}\t{started}\t{ended}")
+
+        self.copy('sessions', ('id', 'quiz_id', 'session_code', 'is_active', 'created_at',
+                               'ended_at'), session_rows())
+
+        n_participants = len(self.participant_ids)
+
+        def response_rows():
+            # This loop produces nearly all rows, so per-row work is kept to string
+            # concatenation: fragments are prepared per session, question and user,
+            # and timestamps (whole seconds) are formatted once per distinct second.
+            gauss = rng.gauss
+            uniform = rng.random
+            interval = args.question_interval
+            for session_id, quiz_id, started, active in sessions:
+                questions = self.quiz_questions[quiz_id]
+                class_size = clamp(round(gauss(args.class_size, args.class_size_stddev)),
+                                   1, n_participants)
+                prepared = []
+                for slot, (question_id, options, correct) in enumerate(questions):
+                    wrong = [f"{answer}\tf\t" for answer in ANSWERS[:options] if answer != correct]
+                    prepared.append((f"{question_id}\t", f"{correct}\tt\t", wrong,
+                                     gauss(0, args.difficulty_stddev), slot * interval,
+                                     slot / len(questions)))
+                stamps = {}
+                for user_id in rng.sample(self.participant_ids, class_size):
+                    prefix = f"{session_id}\t{user_id}\t"
+                    skill = gauss(args.accuracy, args.accuracy_stddev)
+                    for question, right, wrong, difficulty, opened, progress in prepared:
+                        # Live sessions are still in progress: later questions are not answered yet
+                        if active and uniform() < progress:
+                            break
+                        if uniform() < skill + difficulty:
+                            answer = right
+                        else:
+                            answer = wrong[int(uniform() * len(wrong))]
+                        second = int(opened + min(math.exp(gauss(args.answer_delay_mu, args.timing_skew)),
+                                                  interval))
+                        stamp = stamps.get(second)
+                        if stamp is None:
+                            stamp = stamps[second] = str(started + timedelta(seconds=second))
+                        yield prefix + question + answer + stamp
+
+        # ids come from the serial default; nothing references responses
+        with self.deferred_indexes('responses'):
+            self.copy('responses', ('session_id', 'user_id', 'question_id', 'answer',
+                                    'is_correct', 'submitted_at'), response_rows())
+
+    @contextmanager
+    def deferred_indexes(self, table):
+        """Drop a table's secondary indexes and constraints for a load and rebuild them after.
+
+        Checking foreign keys and updating indexes row by row costs far more than
+        COPY itself; rebuilding them in one pass afterwards also re-validates
+        every row. It all happens in the load's transaction, so a failed load
+        leaves them untouched.
+        """
+        with self.conn.cursor() as cur:
+            cur.execute(
+                """SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+                   WHERE conrelid = %s::regclass AND contype IN ('f', 'u')""",
+                (table,)
+            )
+            constraints = cur.fetchall()
+            cur.execute(
+                """SELECT i.relname, pg_get_indexdef(i.oid) FROM pg_index x
+                   JOIN pg_class i ON i.oid = x.indexrelid
+                   WHERE x.indrelid = %s::regclass AND NOT x.indisprimary
+                     AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)""",
+                (table,)
+            )
+            indexes = cur.fetchall()
+            for name, _ in constraints:
+                cur.execute(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"')
+            for name, _ in indexes:
+                cur.execute(f'DROP INDEX "{name}"')
+        yield
+        with self.conn.cursor() as cur:
+            cur.execute("SET LOCAL maintenance_work_mem = '256MB'")
+            for _, definition in indexes:
+                cur.execute(definition)
+            for name, definition in constraints:
+                cur.execute(f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}')
+
+    def run(self):
+        with self.conn.cursor() as cur:
+            cur.execute("LOCK TABLE users, quizzes, questions, sessions, responses IN EXCLUSIVE MODE")
+        self.users()
+        self.quizzes()
+        self.questions()
+        self.sessions_and_responses()
+        # Ids were assigned here, so move the serial sequences past them
+        with self.conn.cursor() as cur:
+            for table in ('users', 'quizzes', 'questions', 'sessions'):
+                cur.execute(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 1) FROM {table}))"
+                )
+
+
+def parse_range(value):
+    low, _, high = value.partition('-')
+    low, high = int(low), int(high or low)
+    if not 1 <= low <= high:
+        raise argparse.ArgumentTypeError("expected N or MIN-MAX with 1 <= MIN <= MAX")
+    return low, high
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dbname', default=f"{DB_CONFIG['dbname']}_load",
+                        help="target database (never the application database)")
+    parser.add_argument('--reset', action='store_true',
+                        help="drop all data and reload schema.sql before generating")
+    parser.add_argument('--seed', type=int, default=0, help="random seed (same seed, same data)")
+    parser.add_argument('--epoch', type=datetime.fromisoformat, default=None,
+                        help="timestamp of the oldest generated row (default 2025-01-01)")
+    parser.add_argument('--days', type=float, default=180,
+                        help="period over which quizzes and sessions are spread")
+
+    parser.add_argument('--presenters', type=int, default=50)
+    parser.add_argument('--users', type=int, default=20000, help="number of participants")
+    parser.add_argument('--quizzes', type=int, default=2000)
+    parser.add_argument('--questions-per-quiz', type=parse_range, default=(5, 20), metavar='MIN-MAX')
+    parser.add_argument('--short-question-fraction', type=float, default=0.2,
+                        help="fraction of questions with only 2 or 3 options")
+    parser.add_argument('--sessions', type=int, default=10000)
+    parser.add_argument('--active-fraction', type=float, default=0.02,
+                        help="fraction of sessions left active (long-lived sessions)")
+
+    parser.add_argument('--class-size', type=float, default=30, help="mean participants per session")
+    parser.add_argument('--class-size-stddev', type=float, default=10)
+    parser.add_argument('--accuracy', type=float, default=0.65,
+                        help="mean probability that a participant answers correctly")
+    parser.add_argument('--accuracy-stddev', type=float, default=0.15,
+                        help="spread of participant skill")
+    parser.add_argument('--difficulty-stddev', type=float, default=0.1,
+                        help="spread of question difficulty")
+    parser.add_argument('--question-interval', type=float, default=30,
+                        help="seconds each question stays open")
+    parser.add_argument('--answer-delay-mu', type=float, default=2.0,
+                        help="mean of the log of the answer delay in seconds")
+    parser.add_argument('--timing-skew', type=float, default=0.6,
+                        help="sigma of the log-normal answer delay; higher means a longer tail")
+    args = parser.parse_args()
+
+    if args.dbname == DB_CONFIG['dbname']:
+        parser.error("--dbname must not be the application database; --reset drops every table")
+    if args.presenters < 1 or args.users < 1:
+        parser.error("--presenters and --users must be at least 1")
+
+    started = time.perf_counter()
+    with psycopg.connect(**dict(DB_CONFIG, dbname=args.dbname)) as conn:
+        if args.reset:
+            with open(SCHEMA_FILE) as f:
+                conn.execute(f.read())
+        generator = Generator(conn, args)
+        generator.run()
+    elapsed = time.perf_counter() - started
+
+    total = sum(generator.counts.values())
+    for table, count in generator.counts.items():
+        print(f"{table:<10} {count:>12,} rows")
+    print(f"{'total':<10} {total:>12,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+"""
+In-memory model of live quiz sessions for the Interactive Quiz System.
+
+An active session is loaded once into a compact structure: questions and
+participants get slots, and answers live in a bytearray indexed by
+(participant slot, question slot), one byte per cell. Participant views,
+duplicate-answer checks and result aggregates are served from memory, while
+submissions are written through to the responses table.
+
+Responses written by other app processes are picked up by re-reading the
+session's answers every SYNC_SECONDS. Response ids are assigned at insert time
+but become visible in commit order, so an id high-water mark would skip rows.
+One thread per session does the re-read while the others keep serving the
+matrix. Each sync also re-checks that the session is still active, so sessions
+ended by another process or expired by the session worker are dropped; models
+unused for EVICT_SECONDS are dropped too.
+"""
+import threading
+import time
+
+import database as db
+
+ANSWERS = 'ABCD'
+# Byte stored in the answer matrix for "not answered yet"
+UNANSWERED = 0
+# How often a live session pulls responses written by other processes
+SYNC_SECONDS = 2.0
+# Models not used for this long are dropped (their session may have been
+# ended by another process or the session worker)
+EVICT_SECONDS = 600.0
+
+_live_sessions = {}
+_registry_lock = threading.Lock()
+
+
+class LiveQuestion:
+    """Question metadata needed to score and tally answers."""
+
+    __slots__ = ('id', 'slot', 'correct_code')
+
+    def __init__(self, question, slot):
+        self.id = question['id']
+        self.slot = slot
+        self.correct_code = ANSWERS.index(question['correct_answer']) + 1
+
+
+class LiveSession:
+    """Answer matrix of one active session."""
+
+    __slots__ = ('session_id', 'quiz_id', 'questions', 'question_slots', 'user_ids',
+                 'participant_slots', 'answers', 'synced_at', 'active', 'lock', 'sync_lock')
+
+    def __init__(self, session, questions):
+        self.session_id = session['id']
+        self.quiz_id = session['quiz_id']
+        self.questions = []
+        self.question_slots = {}
+        self.user_ids = []
+        self.participant_slots = {}
+        self.answers = bytearray()
+        self.synced_at = 0.0
+        self.active = True
+        # Reentrant: looking up an unknown question reloads them under the lock
+        self.lock = threading.RLock()
+        # Held by the one thread refreshing the model; the others keep serving it
+        self.sync_lock = threading.Lock()
+        self._add_questions(questions)
+
+    def _add_questions(self, questions):
+        """Give new questions a slot, widening every participant's row of the matrix."""
+        added = [q for q in questions if q['id'] not in self.question_slots]
+        if not added:
+            return
+        old_width = len(self.questions)
+        for question in added:
+            live = LiveQuestion(question, len(self.questions))
+            self.questions.append(live)
+            self.question_slots[live.id] = live
+        width = len(self.questions)
+        widened = bytearray(len(self.user_ids) * width)
+        for slot in range(len(self.user_ids)):
+            widened[slot * width:slot * width + old_width] = \
+                self.answers[slot * old_width:(slot + 1) * old_width]
+        self.answers = widened
+
+    def _question(self, question_id):
+        """Question metadata, reloading the quiz's questions if the ID is new to the model.
+
+        Presenters can add questions while a session is live. Returns None if
+        the question does not belong to this session's quiz.
+        """
+        with self.lock:
+            question = self.question_slots.get(question_id)
+            if question is None:
+                self._add_questions(db.get_questions_by_quiz(self.quiz_id))
+                question = self.question_slots.get(question_id)
+            return question
+
+    def _participant_slot(self, user_id):
+        """Slot of a participant, adding a row to the matrix on their first answer."""
+        slot = self.participant_slots.get(user_id)
+        if slot is None:
+            slot = len(self.user_ids)
+            self.participant_slots[user_id] = slot
+            self.user_ids.append(user_id)
+            self.answers.extend(bytes(len(self.questions)))
+        return slot
+
+    def _record(self, question_id, user_id, answer):
+        with self.lock:
+            question = self._question(question_id)
+            if question is None:
+                return
+            cell = self._participant_slot(user_id) * len(self.questions) + question.slot
+            self.answers[cell] = ANSWERS.index(answer) + 1
+
+    def sync(self, force=False):
+        """Merge in responses written by other processes (at most every SYNC_SECONDS).
+
+        Recording an answer is idempotent, so the whole session is simply re-read.
+        Only one thread refreshes at a time; when a whole class reruns at once
+        the others return straight away and serve the current matrix.
+
+        Returns whether the session is still active. That is read from a replica
+        and may lag; submit_response rejects answers to ended sessions itself.
+        """
+        if not force and time.monotonic() - self.synced_at < SYNC_SECONDS:
+            return self.active
+        if not self.sync_lock.acquire(blocking=force):
+            return self.active
+        try:
+            now = time.monotonic()
+            if not force and now - self.synced_at < SYNC_SECONDS:
+                # Another thread refreshed while this one was checking
+                return self.active
+            self.active = db.is_session_active(self.session_id)
+            if not self.active:
+                return False
+            answers = db.get_session_answers(self.session_id)
+            with self.lock:
+                for question_id, user_id, answer in answers:
+                    self._record(question_id, user_id, answer)
+                self.synced_at = now
+            return True
+        finally:
+            self.sync_lock.release()
+
+    def _code(self, question_id, user_id):
+        with self.lock:
+            question = self._question(question_id)
+            slot = self.participant_slots.get(user_id)
+            if slot is None or question is None:
+                return UNANSWERED
+            return self.answers[slot * len(self.questions) + question.slot]
+
+    def user_response(self, question_id, user_id):
+        """The user's answer to a question as {'answer', 'is_correct'}, or None."""
+        code = self._code(question_id, user_id)
+        if code == UNANSWERED:
+            return None
+        return {
+            'answer': ANSWERS[code - 1],
+            'is_correct': code == self._question(question_id).correct_code,
+        }
+
+    def submit(self, question_id, user_id, answer):
+        """Record an answer in memory and write it through to the database."""
+        if self._code(question_id, user_id) != UNANSWERED:
+            raise ValueError("Answer already submitted. Cannot modify response.")
+        # The database stays authoritative for concurrent duplicates, so the
+        # lock is not held across the write
+        response_id = db.submit_response(question_id, user_id, self.session_id, answer)
+        self._record(question_id, user_id, answer)
+        return response_id
+
+    def _column(self, question_id):
+        """Answer codes of every participant for one question."""
+        with self.lock:
+            question = self._question(question_id)
+            if question is None:
+                return bytearray()
+            return self.answers[question.slot::len(self.questions)]
+
+    def question_results(self, question_id):
+        """Answer counts for a question, shaped like db.get_question_results."""
+        column = self._column(question_id)
+        counts = [(letter, column.count(code)) for code, letter in enumerate(ANSWERS, 1)]
+        return [{'answer': letter, 'count': count} for letter, count in counts if count]
+
+    def question_responses(self, question_id):
+        """Participants' answers to a question, shaped like db.get_question_responses_detailed.
+
+        Participants are listed in the order they first answered in this session.
+        """
+        column = self._column(question_id)
+        if not column:
+            return []
+        correct_code = self._question(question_id).correct_code
+        answered = [(code, self.user_ids[slot]) for slot, code in enumerate(column) if code]
+        names = db.get_user_names([user_id for _, user_id in answered])
+        return [
+            {
+                'answer': ANSWERS[code - 1],
+                'user_id': user_id,
+                'participant_name': names[user_id],
+                'is_correct': code == correct_code,
+            }
+            for code, user_id in sorted(answered, key=lambda item: item[0])
+        ]
+
+
+def get_live_session(session_id):
+    """Get the in-memory model of an active session, loading it on first use.
+
+    Returns None once the session has ended, dropping its model.
+    """
+    _evict_idle()
+    live = _live_sessions.get(session_id)
+    if live is None:
+        with _registry_lock:
+            live = _live_sessions.get(session_id)
+            if live is None:
+                session = db.get_session_by_id(session_id)
+                if session is None or not session['is_active']:
+                    return None
+                live = LiveSession(session, db.get_questions_by_quiz(session['quiz_id']))
+                if not live.sync(force=True):
+                    return None
+                _live_sessions[session_id] = live
+    elif not live.sync():
+        drop_live_session(session_id)
+        return None
+    return live
+
+
+def _evict_idle():
+    """Drop models nobody has used for EVICT_SECONDS."""
+    cutoff = time.monotonic() - EVICT_SECONDS
+    for session_id, live in list(_live_sessions.items()):
+        if live.synced_at < cutoff:
+            drop_live_session(session_id)
+
+
+def drop_live_session(session_id):
+    """Forget a session's in-memory model, e.g. once it has ended."""
+    with _registry_lock:
+        _live_sessions.pop(session_id, None)
@@ -0,0 +1,43 @@
+-- Interactive Quiz System Database Migration
+-- Brings a database created from an older schema.sql up to date without
+-- dropping data. Every statement is idempotent, so it is safe to rerun.
+
+-- Users: per-browser token so logging in again reuses the same row
+ALTER TABLE users ADD COLUMN IF NOT EXISTS device_token VARCHAR(64);
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'users_name_role_device_token_key') THEN
+        ALTER TABLE users ADD CONSTRAINT users_name_role_device_token_key UNIQUE (name, role, device_token);
+    END IF;
+END $$;
+
+-- Sessions: presenter-paced mode
+ALTER TABLE sessions ADD COLUMN IF NOT EXISTS paced BOOLEAN DEFAULT FALSE;
+ALTER TABLE sessions ADD COLUMN IF NOT EXISTS current_question_id INTEGER REFERENCES questions(id) ON DELETE SET NULL;
+
+-- Sessions: pending results summaries are tracked on the session row
+ALTER TABLE sessions ADD COLUMN IF NOT EXISTS summarized_at TIMESTAMP;
+
+-- Results summaries of ended sessions (computed by session_worker.py)
+CREATE TABLE IF NOT EXISTS session_summaries (
+    session_id INTEGER PRIMARY KEY REFERENCES sessions(id) ON DELETE CASCADE,
+    participant_count INTEGER NOT NULL,
+    response_count INTEGER NOT NULL,
+    question_tallies JSONB NOT NULL,
+    score_distribution JSONB NOT NULL,
+    leaderboard JSONB NOT NULL,
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+UPDATE sessions s SET summarized_at = ss.computed_at
+FROM session_summaries ss
+WHERE ss.session_id = s.id AND s.summarized_at IS NULL;
+
+-- Indexes (replacing the single-column responses and is_active indexes)
+CREATE INDEX IF NOT EXISTS idx_responses_question_session ON responses(question_id, session_id);
+CREATE INDEX IF NOT EXISTS idx_responses_session_user ON responses(session_id, user_id);
+CREATE INDEX IF NOT EXISTS idx_sessions_active_created ON sessions(created_at DESC) WHERE is_active;
+CREATE INDEX IF NOT EXISTS idx_sessions_ended ON sessions(ended_at DESC NULLS LAST) WHERE NOT is_active;
+CREATE INDEX IF NOT EXISTS idx_sessions_unsummarized ON sessions(id) WHERE NOT is_active AND summarized_at IS NULL;
+DROP INDEX IF EXISTS idx_responses_question_id;
+DROP INDEX IF EXISTS idx_responses_session_id;
+DROP INDEX IF EXISTS idx_sessions_active;
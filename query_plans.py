@@ -0,0 +1,498 @@
+"""
+Query-plan regression suite and index advisor for the Interactive Quiz System.
+
+Seeds a scratch database with a realistic large dataset, runs
+EXPLAIN (ANALYZE, BUFFERS) on every query issued by database.py and checks the
+plans and timings against stored baselines.
+
+Usage:
+    python query_plans.py                     # seed, explain and check
+    python query_plans.py --record-timings    # record this machine's timings
+    python query_plans.py --update-baselines  # record new plans and timings
+    python query_plans.py --skip-seed         # reuse the already seeded data
+
+Plan shapes do not depend on the machine and are committed in
+query_plan_baselines.json; timings are kept locally in query_plan_timings.json.
+
+The scratch database (default: <DB_NAME>_plans) is dropped and recreated from
+schema.sql, so never point --dbname at a database holding real data.
+"""
+import argparse
+import ast
+import json
+import os
+import re
+import sys
+
+import psycopg
+from psycopg.rows import dict_row
+from psycopg.types.json import Jsonb
+
+import database as db
+from database import DB_CONFIG
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCHEMA_FILE = os.path.join(BASE_DIR, 'schema.sql')
+BASELINE_FILE = os.path.join(BASE_DIR, 'query_plan_baselines.json')
+TIMINGS_FILE = os.path.join(BASE_DIR, 'query_plan_timings.json')
+DATABASE_FILE = os.path.join(BASE_DIR, 'database.py')
+
+# Dataset size at --scale 1 (everything grows linearly with the scale). Every
+# table the application queries holds at least the default --seq-scan-min-rows,
+# so a sequential scan on any of them fails the check.
+SEED_SIZES = {
+    'users': 20000,
+    'quizzes': 10000,
+    'questions_per_quiz': 10,
+    'sessions': 20000,
+    'participants_per_session': 10,
+}
+
+# Every query in database.py, with the names of its positional parameters.
+# Parameters are looked up by name in the sample row picked after seeding;
+# missing_queries() fails the run when a query has no entry here.
+QUERIES = {
+    'create_user': (db.CREATE_USER_SQL, ('name', 'role')),
+    'resolve_user': (db.RESOLVE_USER_SQL, ('name', 'role', 'device_token')),
+    'get_user_names': (db.GET_USER_NAMES_SQL, ('user_ids',)),
+    'get_user_by_id': (db.GET_USER_BY_ID_SQL, ('user_id',)),
+    'create_quiz': (db.CREATE_QUIZ_SQL, ('title', 'presenter_id')),
+    'get_all_quizzes': (db.GET_ALL_QUIZZES_SQL, ()),
+    'get_quiz_by_id': (db.GET_QUIZ_BY_ID_SQL, ('quiz_id',)),
+    'add_question': (
+        db.ADD_QUESTION_SQL,
+        ('quiz_id', 'text', 'option', 'option', 'option', 'option', 'answer')),
+    'get_questions_by_quiz': (db.GET_QUESTIONS_BY_QUIZ_SQL, ('quiz_id',)),
+    'get_question_by_id': (db.GET_QUESTION_BY_ID_SQL, ('question_id',)),
+    'create_session': (db.CREATE_SESSION_SQL, ('quiz_id', 'new_session_code', 'paced')),
+    'get_session_by_code': (db.GET_SESSION_BY_CODE_SQL, ('session_code',)),
+    'get_session_by_id': (db.GET_SESSION_BY_ID_SQL, ('session_id',)),
+    'is_session_active': (db.IS_SESSION_ACTIVE_SQL, ('session_id',)),
+    'get_active_sessions': (db.GET_ACTIVE_SESSIONS_SQL, ()),
+    'get_ended_sessions': (db.GET_ENDED_SESSIONS_SQL, ('limit',)),
+    'expire_idle_sessions': (db.EXPIRE_IDLE_SESSIONS_SQL, ('idle_minutes', 'idle_minutes')),
+    'end_session': (db.END_SESSION_SQL, ('session_id',)),
+    'set_current_question': (db.SET_CURRENT_QUESTION_SQL, ('question_id', 'session_id')),
+    'get_next_question_id': (db.GET_NEXT_QUESTION_ID_SQL, ('quiz_id', 'question_id')),
+    'get_previous_question_id': (db.GET_PREVIOUS_QUESTION_ID_SQL, ('quiz_id', 'question_id')),
+    'get_question_number': (db.GET_QUESTION_NUMBER_SQL, ('quiz_id', 'question_id')),
+    'submit_response.lock_session': (db.LOCK_ACTIVE_SESSION_SQL, ('session_id',)),
+    'submit_response.check_existing': (
+        db.GET_RESPONSE_ID_SQL, ('question_id', 'user_id', 'session_id')),
+    'submit_response.correct_answer': (db.GET_CORRECT_ANSWER_SQL, ('question_id',)),
+    # The presenter never answers, so the insert cannot hit the unique constraint
+    'submit_response.insert': (
+        db.INSERT_RESPONSE_SQL,
+        ('question_id', 'presenter_id', 'session_id', 'answer', 'is_correct')),
+    'get_responses_by_session': (db.GET_RESPONSES_BY_SESSION_SQL, ('session_id',)),
+    'get_session_answers': (db.GET_SESSION_ANSWERS_SQL, ('session_id',)),
+    'get_question_results': (db.GET_QUESTION_RESULTS_SQL, ('question_id', 'session_id')),
+    'get_question_responses_detailed': (
+        db.GET_QUESTION_RESPONSES_DETAILED_SQL, ('question_id', 'session_id')),
+    'get_user_response': (db.GET_USER_RESPONSE_SQL, ('question_id', 'user_id', 'session_id')),
+    'get_unsummarized_sessions': (db.GET_UNSUMMARIZED_SESSIONS_SQL, ('limit',)),
+    'materialize_session_summary.tallies': (db.SESSION_ANSWER_TALLIES_SQL, ('session_id',)),
+    'materialize_session_summary.scores': (db.SESSION_SCORES_SQL, ('session_id',)),
+    'materialize_session_summary.upsert': (
+        db.UPSERT_SESSION_SUMMARY_SQL,
+        ('session_id', 'count', 'count', 'empty_object', 'empty_list', 'empty_list')),
+    'materialize_session_summary.mark': (db.MARK_SESSION_SUMMARIZED_SQL, ('session_id',)),
+    'get_session_summary': (db.GET_SESSION_SUMMARY_SQL, ('session_id',)),
+}
+
+# Queries that return a whole table by design; a sequential scan is expected there
+ALLOWED_SEQ_SCANS = {
+    'get_all_quizzes': {'quizzes'},
+    # With a thousand sessions live at once, hashing quizzes beats a primary-key
+    # lookup per session; the pinned plan still catches any other change
+    'get_active_sessions': {'quizzes'},
+}
+
+SCAN_NODES = ('Seq Scan', 'Index Scan', 'Index Only Scan', 'Bitmap Heap Scan')
+
+
+def scratch_connection(dbname, autocommit=False):
+    """Open a connection to the scratch database."""
+    return psycopg.connect(**dict(DB_CONFIG, dbname=dbname), autocommit=autocommit)
+
+
+def seed(dbname, scale):
+    """Recreate the scratch database from schema.sql and fill it with data."""
+    with psycopg.connect(**dict(DB_CONFIG, dbname='postgres'), autocommit=True) as admin:
+        admin.execute(f'DROP DATABASE IF EXISTS "{dbname}"')
+        admin.execute(f'CREATE DATABASE "{dbname}"')
+
+    sizes = {key: value * scale for key, value in SEED_SIZES.items()}
+    sizes['questions_per_quiz'] = SEED_SIZES['questions_per_quiz']
+    sizes['participants_per_session'] = SEED_SIZES['participants_per_session']
+
+    with scratch_connection(dbname) as conn:
+        with open(SCHEMA_FILE) as f:
+            conn.execute(f.read())
+        # The schema inserts the default presenter (id 1); participants start at id 2
+        conn.execute(
+            """INSERT INTO users (name, role)
+               SELECT 'Participant ' || g, 'participant' FROM generate_series(1, %(users)s) g""",
+            sizes)
+        conn.execute(
+            """INSERT INTO quizzes (title, created_by, created_at)
+               SELECT 'Quiz ' || g, 1, now() - g * interval '1 hour'
+               FROM generate_series(1, %(quizzes)s) g""",
+            sizes)
+        conn.execute(
+            """INSERT INTO questions (quiz_id, text, option_a, option_b, option_c, option_d, correct_answer)
+               SELECT q.id, 'Question ' || n || ' of quiz ' || q.id,
+                      'Option A', 'Option B', 'Option C', 'Option D',
+                      (ARRAY['A', 'B', 'C', 'D'])[1 + (q.id + n) %% 4]
+               FROM quizzes q CROSS JOIN generate_series(1, %(questions_per_quiz)s) n""",
+            sizes)
+        # One session in twenty is still active and one in ten is paced; all but
+        # one in fifty ended sessions already have their summary
+        conn.execute(
+            """INSERT INTO sessions (quiz_id, session_code, is_active, paced, created_at, ended_at,
+                                     summarized_at)
+               SELECT 1 + g %% %(quizzes)s, 'S' || lpad(to_hex(g), 9, '0'), g %% 20 = 0, g %% 10 = 0,
+                      now() - g * interval '10 minutes',
+                      CASE WHEN g %% 20 = 0 THEN NULL
+                           ELSE now() - g * interval '10 minutes' + interval '30 minutes' END,
+                      CASE WHEN g %% 20 = 0 OR g %% 50 = 1 THEN NULL
+                           ELSE now() - g * interval '10 minutes' + interval '31 minutes' END
+               FROM generate_series(1, %(sessions)s) g""",
+            sizes)
+        conn.execute(
+            """UPDATE sessions s SET current_question_id = (
+                   SELECT MIN(id) FROM questions WHERE quiz_id = s.quiz_id)
+               WHERE paced"""
+        )
+        conn.execute(
+            """INSERT INTO responses (question_id, user_id, session_id, answer, is_correct, submitted_at)
+               SELECT qs.id, 2 + (s.id * %(participants_per_session)s + p) %% %(users)s, s.id,
+                      a.answer, a.answer = qs.correct_answer,
+                      s.created_at + (p + qs.id %% 60) * interval '1 second'
+               FROM sessions s
+               JOIN questions qs ON qs.quiz_id = s.quiz_id
+               CROSS JOIN generate_series(0, %(participants_per_session)s - 1) p
+               CROSS JOIN LATERAL (
+                   SELECT (ARRAY['A', 'B', 'C', 'D'])[1 + (p * 7 + qs.id) %% 4] AS answer
+               ) a""",
+            sizes)
+        conn.execute(
+            """INSERT INTO session_summaries
+                   (session_id, participant_count, response_count, question_tallies,
+                    score_distribution, leaderboard, computed_at)
+               SELECT s.id, c.participants, c.responses, t.tallies, '[]', '[]', s.summarized_at
+               FROM sessions s
+               JOIN (SELECT session_id, COUNT(DISTINCT user_id) AS participants, COUNT(*) AS responses
+                     FROM responses GROUP BY session_id) c ON c.session_id = s.id
+               JOIN (SELECT session_id, jsonb_object_agg(question_id::text, counts) AS tallies
+                     FROM (SELECT session_id, question_id, jsonb_object_agg(answer, n) AS counts
+                           FROM (SELECT session_id, question_id, answer, COUNT(*) AS n
+                                 FROM responses GROUP BY session_id, question_id, answer) a
+                           GROUP BY session_id, question_id) q
+                     GROUP BY session_id) t ON t.session_id = s.id
+               WHERE s.summarized_at IS NOT NULL"""
+        )
+    with scratch_connection(dbname, autocommit=True) as conn:
+        conn.execute("VACUUM ANALYZE")
+
+
+def sample_params(conn):
+    """Pick representative parameters: the newest active session and one of its answers."""
+    with conn.cursor(row_factory=dict_row) as cur:
+        cur.execute(
+            """SELECT s.id AS session_id, s.session_code, s.quiz_id, r.question_id, r.user_id
+               FROM sessions s
+               JOIN responses r ON r.session_id = s.id
+               WHERE s.is_active
+               ORDER BY s.id DESC
+               LIMIT 1"""
+        )
+        params = cur.fetchone()
+    if params is None:
+        raise RuntimeError("Scratch database has no active session with responses; run without --skip-seed")
+    params.update(
+        name='Plan Check', title='Plan Check', text='Plan Check', option='Option', answer='A',
+        role='participant', device_token='plan-check', presenter_id=1, user_ids=[params['user_id']],
+        new_session_code='PLAN01', paced=False, is_correct=True, limit=50, idle_minutes=120,
+        count=0, empty_object=Jsonb({}), empty_list=Jsonb([]),
+    )
+    return params
+
+
+def missing_queries():
+    """Describe database.py queries that QUERIES does not cover.
+
+    Catches *_SQL constants without an entry and SQL written inline in an
+    execute() call instead of as a constant.
+    """
+    covered = {sql for sql, _ in QUERIES.values()}
+    problems = [
+        f"{name} has no entry in QUERIES"
+        for name, value in vars(db).items()
+        if name.endswith('_SQL') and value not in covered
+    ]
+    with open(SCHEMA_FILE) as f:
+        tables = set(re.findall(r'CREATE TABLE (\w+)', f.read()))
+    with open(DATABASE_FILE) as f:
+        tree = ast.parse(f.read())
+    for function in ast.walk(tree):
+        if not isinstance(function, ast.FunctionDef):
+            continue
+        for call in ast.walk(function):
+            if not (isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute)
+                    and call.func.attr == 'execute' and call.args
+                    and isinstance(call.args[0], ast.Constant)
+                    and isinstance(call.args[0].value, str)):
+                continue
+            if tables & set(re.findall(r'\w+', call.args[0].value)):
+                problems.append(f"{function.name}() runs inline SQL; move it to a *_SQL constant")
+    return problems
+
+
+def table_info(conn):
+    """Return {table: (estimated rows, {column: data type})} for the public schema."""
+    info = {}
+    with conn.cursor() as cur:
+        cur.execute(
+            """SELECT c.relname, c.reltuples::bigint, a.attname, format_type(a.atttypid, a.atttypmod)
+               FROM pg_class c
+               JOIN pg_namespace n ON n.oid = c.relnamespace
+               JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+               WHERE n.nspname = 'public' AND c.relkind = 'r'"""
+        )
+        for table, rows, column, data_type in cur.fetchall():
+            info.setdefault(table, (rows, {}))[1][column] = data_type
+    return info
+
+
+def explain(conn, sql, params, runs):
+    """EXPLAIN ANALYZE a query `runs` times and return the fastest plan.
+
+    Every run is rolled back, so write queries leave the data untouched.
+    """
+    best = None
+    for _ in range(runs):
+        with conn.cursor() as cur:
+            cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params)
+            result = cur.fetchone()[0][0]
+        conn.rollback()
+        if best is None or result['Execution Time'] < best['Execution Time']:
+            best = result
+    return best
+
+
+def walk(node, parents=()):
+    """Yield (node, ancestors) for every node of a plan tree."""
+    yield node, parents
+    for child in node.get('Plans', []):
+        yield from walk(child, parents + (node,))
+
+
+def scan_signature(plan):
+    """Sorted list of 'scan type:relation' entries, the part of a plan the baseline pins."""
+    return sorted(
+        f"{node['Node Type']}:{node['Relation Name']}"
+        for node, _ in walk(plan['Plan'])
+        if node['Node Type'] in SCAN_NODES and 'Relation Name' in node
+    )
+
+
+def shared_buffers(plan):
+    """Total shared buffers hit and read by the query."""
+    top = plan['Plan']
+    return top.get('Shared Hit Blocks', 0) + top.get('Shared Read Blocks', 0)
+
+
+def filter_columns(condition, columns):
+    """Columns of a table referenced in a plan condition, in order of appearance."""
+    found = []
+    for name in re.findall(r'\b([a-z_][a-z0-9_]*)\b', condition or ''):
+        if name in columns and name not in found:
+            found.append(name)
+    return found
+
+
+def advise(plan, tables, min_rows):
+    """Propose composite or partial indexes for the inefficient scans in a plan."""
+    proposals = []
+    for node, parents in walk(plan['Plan']):
+        table = node.get('Relation Name')
+        if node['Node Type'] not in SCAN_NODES or table not in tables:
+            continue
+        rows, columns = tables[table]
+        removed = node.get('Rows Removed by Filter', 0)
+        if node['Node Type'] == 'Seq Scan':
+            if rows < min_rows:
+                continue
+        elif removed <= node.get('Actual Rows', 0):
+            # Index scans are only worth improving when they discard most of what they read
+            continue
+
+        index_cols = filter_columns(node.get('Index Cond') or node.get('Recheck Cond'), columns)
+        booleans = []
+        for column in filter_columns(node.get('Filter'), columns):
+            if columns[column] == 'boolean':
+                booleans.append(column)
+            elif column not in index_cols:
+                index_cols.append(column)
+
+        # Sorting the filtered rows can be served by the index too
+        sort = next((p for p in reversed(parents) if p['Node Type'] == 'Sort'), None)
+        if sort:
+            for key in sort.get('Sort Key', []):
+                qualified, _, direction = key.partition(' ')
+                alias, _, column = qualified.rpartition('.')
+                if alias and alias != node.get('Alias', table):
+                    continue
+                if column in columns and column not in index_cols:
+                    index_cols.append(f"{column} {direction}".strip())
+
+        if not index_cols and not booleans:
+            continue
+        if not index_cols:
+            index_cols = ['id']
+        name = f"idx_{table}_" + '_'.join(c.split()[0] for c in index_cols)
+        statement = f"CREATE INDEX {name} ON {table}({', '.join(index_cols)})"
+        if booleans:
+            name += '_' + '_'.join(booleans)
+            statement = (f"CREATE INDEX {name} ON {table}({', '.join(index_cols)}) "
+                         f"WHERE {' AND '.join(booleans)}")
+        proposals.append(statement + ';')
+    return proposals
+
+
+def check(results, baselines, timings, tables, min_rows, tolerance, slack_ms):
+    """Compare plans with the baselines and timings and return a list of failure messages."""
+    failures = []
+    for name, plan in results.items():
+        allowed = ALLOWED_SEQ_SCANS.get(name, set())
+        for node, _ in walk(plan['Plan']):
+            table = node.get('Relation Name')
+            if (node['Node Type'] == 'Seq Scan' and table not in allowed
+                    and tables.get(table, (0,))[0] >= min_rows):
+                failures.append(f"{name}: sequential scan on {table} ({tables[table][0]} rows)")
+
+        baseline = baselines.get(name)
+        if baseline is None:
+            failures.append(f"{name}: no baseline recorded (run with --update-baselines)")
+            continue
+        signature = scan_signature(plan)
+        if signature != baseline['scans']:
+            failures.append(f"{name}: plan changed from {baseline['scans']} to {signature}")
+        recorded = timings.get(name)
+        if recorded is None:
+            continue
+        elapsed = plan['Execution Time']
+        limit = max(recorded['execution_ms'] * tolerance, recorded['execution_ms'] + slack_ms)
+        if elapsed > limit:
+            failures.append(
+                f"{name}: {elapsed:.2f} ms exceeds baseline {recorded['execution_ms']:.2f} ms")
+    return failures
+
+
+def read_json(path):
+    """Contents of a JSON file, or {} when it does not exist."""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_json(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dbname', default=f"{DB_CONFIG['dbname']}_plans",
+                        help="scratch database (dropped and recreated when seeding)")
+    parser.add_argument('--scale', type=int, default=1, help="dataset size multiplier")
+    parser.add_argument('--skip-seed', action='store_true', help="reuse the existing scratch data")
+    parser.add_argument('--runs', type=int, default=3, help="EXPLAIN ANALYZE runs per query")
+    parser.add_argument('--update-baselines', action='store_true',
+                        help="record the current plans and timings")
+    parser.add_argument('--record-timings', action='store_true',
+                        help="record this machine's timings, keeping the committed plans")
+    parser.add_argument('--tolerance', type=float, default=2.0,
+                        help="allowed slowdown factor against the baseline")
+    parser.add_argument('--slack-ms', type=float, default=5.0,
+                        help="timing differences below this are never reported")
+    parser.add_argument('--seq-scan-min-rows', type=int, default=10000,
+                        help="sequential scans on tables at least this large fail the check")
+    args = parser.parse_args()
+
+    if args.dbname == DB_CONFIG['dbname']:
+        parser.error("--dbname must not be the application database; it is dropped and reseeded")
+
+    problems = missing_queries()
+    if problems:
+        print("QUERIES DOES NOT COVER database.py:")
+        for problem in problems:
+            print(f"  ✗ {problem}")
+        return 1
+
+    if not args.skip_seed:
+        print(f"Seeding {args.dbname} at scale {args.scale}...")
+        seed(args.dbname, args.scale)
+
+    with scratch_connection(args.dbname) as conn:
+        tables = table_info(conn)
+        params = sample_params(conn)
+        results = {}
+        for name, (sql, keys) in QUERIES.items():
+            results[name] = explain(conn, sql, [params[key] for key in keys], args.runs)
+
+    print(f"{'query':<35} {'ms':>9} {'buffers':>9}  scans")
+    for name, plan in results.items():
+        print(f"{name:<35} {plan['Execution Time']:>9.2f} {shared_buffers(plan):>9}  "
+              f"{', '.join(scan_signature(plan))}")
+
+    proposals = []
+    for plan in results.values():
+        for statement in advise(plan, tables, args.seq_scan_min_rows):
+            if statement not in proposals:
+                proposals.append(statement)
+    if proposals:
+        print("\nSuggested indexes:")
+        for statement in proposals:
+            print(f"  {statement}")
+
+    if args.update_baselines or args.record_timings:
+        if args.update_baselines:
+            baselines = {name: {'scans': scan_signature(plan)} for name, plan in results.items()}
+            write_json(BASELINE_FILE, {'scale': args.scale, 'queries': baselines})
+            print(f"\nBaselines written to {BASELINE_FILE}")
+        timings = {
+            name: {
+                'execution_ms': round(plan['Execution Time'], 3),
+                'buffers': shared_buffers(plan),
+            }
+            for name, plan in results.items()
+        }
+        write_json(TIMINGS_FILE, {'scale': args.scale, 'queries': timings})
+        print(f"Timings written to {TIMINGS_FILE}")
+        return 0
+
+    baselines = read_json(BASELINE_FILE).get('queries', {})
+    stored = read_json(TIMINGS_FILE)
+    timings = stored.get('queries', {})
+    if not timings:
+        print("\nNo local timings; only plans are checked (record them with --record-timings)")
+    elif stored.get('scale') != args.scale:
+        print(f"\nTimings were recorded at scale {stored.get('scale')}; they may not compare")
+
+    failures = check(results, baselines, timings, tables, args.seq_scan_min_rows,
+                     args.tolerance, args.slack_ms)
+    if failures:
+        print("\nQUERY PLAN REGRESSIONS:")
+        for failure in failures:
+            print(f"  ✗ {failure}")
+        return 1
+    print("\nAll query plans match their baselines")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
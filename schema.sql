@@ -1,5 +1,6 @@
 -- Interactive Quiz System Database Schema
 -- Drop tables if they exist (for clean setup)
+DROP TABLE IF EXISTS session_summaries CASCADE;
 DROP TABLE IF EXISTS responses CASCADE;
 DROP TABLE IF EXISTS questions CASCADE;
 DROP TABLE IF EXISTS sessions CASCADE;
@@ -11,7 +12,10 @@ CREATE TABLE users (
     id SERIAL PRIMARY KEY,
     name VARCHAR(100) NOT NULL,
     role VARCHAR(20) NOT NULL CHECK (role IN ('presenter', 'participant')),
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    -- Per-browser token; logging in again with the same name reuses the row
+    device_token VARCHAR(64),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(name, role, device_token)
 );
 
 -- Quizzes table
@@ -41,8 +45,13 @@ CREATE TABLE sessions (
     quiz_id INTEGER REFERENCES quizzes(id) ON DELETE CASCADE,
     session_code VARCHAR(10) UNIQUE NOT NULL,
     is_active BOOLEAN DEFAULT TRUE,
+    -- Presenter-paced sessions show participants only the current question
+    paced BOOLEAN DEFAULT FALSE,
+    current_question_id INTEGER REFERENCES questions(id) ON DELETE SET NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    ended_at TIMESTAMP
+    ended_at TIMESTAMP,
+    -- Set when session_worker.py stores the results summary
+    summarized_at TIMESTAMP
 );
 
 -- Responses table
@@ -57,13 +66,30 @@ CREATE TABLE responses (
     UNIQUE(question_id, user_id, session_id)
 );
 
+-- Results summaries of ended sessions (computed by session_worker.py)
+CREATE TABLE session_summaries (
+    session_id INTEGER PRIMARY KEY REFERENCES sessions(id) ON DELETE CASCADE,
+    participant_count INTEGER NOT NULL,
+    response_count INTEGER NOT NULL,
+    question_tallies JSONB NOT NULL,    -- {"<question_id>": {"A": count, ...}}
+    score_distribution JSONB NOT NULL,  -- [{"score": correct answers, "count": participants}]
+    leaderboard JSONB NOT NULL,         -- [{"user_id", "name", "score", "answered"}]
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Create indexes for better performance
+-- (run `python query_plans.py` to check query plans against these indexes)
 CREATE INDEX idx_questions_quiz_id ON questions(quiz_id);
-CREATE INDEX idx_responses_question_id ON responses(question_id);
+CREATE INDEX idx_responses_question_session ON responses(question_id, session_id);
+CREATE INDEX idx_responses_session_user ON responses(session_id, user_id);
 CREATE INDEX idx_responses_user_id ON responses(user_id);
-CREATE INDEX idx_responses_session_id ON responses(session_id);
 CREATE INDEX idx_sessions_code ON sessions(session_code);
-CREATE INDEX idx_sessions_active ON sessions(is_active);
+-- Only active sessions are listed, newest first
+CREATE INDEX idx_sessions_active_created ON sessions(created_at DESC) WHERE is_active;
+-- Ended sessions are listed most recent first on the results page
+CREATE INDEX idx_sessions_ended ON sessions(ended_at DESC NULLS LAST) WHERE NOT is_active;
+-- Ended sessions still waiting for a summary; stays small however much history accrues
+CREATE INDEX idx_sessions_unsummarized ON sessions(id) WHERE NOT is_active AND summarized_at IS NULL;
 
 -- Insert a default presenter user
 INSERT INTO users (name, role) VALUES ('Default Presenter', 'presenter');
@@ -0,0 +1,64 @@
+"""
+Background session lifecycle worker for the Interactive Quiz System.
+
+Periodically ends sessions that have been idle for too long and stores a
+results summary (per-question tallies, score distribution and leaderboard)
+for every ended session, so historical results never recompute from
+responses.
+
+Usage:
+    python session_worker.py            # run forever
+    python session_worker.py --once     # single pass, e.g. from cron
+"""
+import argparse
+import os
+import sys
+import time
+
+import database as db
+
+# Sessions without new responses for this long are ended automatically
+IDLE_MINUTES = int(os.getenv('SESSION_IDLE_MINUTES', '120'))
+# Seconds between passes
+INTERVAL_SECONDS = float(os.getenv('SESSION_WORKER_INTERVAL', '30'))
+
+
+def run_once(idle_minutes, batch_size=100):
+    """Expire idle sessions and summarise ended ones; returns (expired, summarised)."""
+    expired = db.expire_idle_sessions(idle_minutes)
+    summarised = 0
+    while True:
+        session_ids = db.get_unsummarized_sessions(batch_size)
+        for session_id in session_ids:
+            db.materialize_session_summary(session_id)
+        summarised += len(session_ids)
+        if len(session_ids) < batch_size:
+            return len(expired), summarised
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--once', action='store_true', help="run a single pass and exit")
+    parser.add_argument('--idle-minutes', type=int, default=IDLE_MINUTES,
+                        help="end active sessions idle for this many minutes")
+    parser.add_argument('--interval', type=float, default=INTERVAL_SECONDS,
+                        help="seconds between passes")
+    args = parser.parse_args()
+
+    while True:
+        try:
+            expired, summarised = run_once(args.idle_minutes)
+            if expired or summarised:
+                print(f"Expired {expired} idle sessions, summarised {summarised} sessions", flush=True)
+        except Exception as e:
+            if args.once:
+                raise
+            # Keep the worker alive through transient database errors
+            print(f"Session worker pass failed: {e}", file=sys.stderr, flush=True)
+        if args.once:
+            return 0
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    sys.exit(main())